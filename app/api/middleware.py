@@ -1,131 +1,180 @@
 """API middleware for CORS, rate limiting, and logging."""
-from fastapi import Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import status
+from fastapi.responses import JSONResponse, Response
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.core.config import get_settings
-from app.core.redis_client import increment_request_count
+from app.core.redis_client import check_rate_limit, token_bucket_consume
+from app.core.log_queue import access_log_queue
+from app.core.request_context import request_id_var
+from uuid import uuid4
 import logging
+import re
 import time
-import json
 
 logger = logging.getLogger(__name__)
 
+# Paths exempt from rate limiting (exact match)
+_RL_SKIP = frozenset({"/api/health", "/api/health/status"})
+
+# Path prefixes exempt from request logging
+_LOG_SKIP_PREFIXES = ("/api/docs",)
+
+# Built once and reused: a Response only carries status, headers and body,
+# so rejected requests skip JSON serialization and response construction
+_RATE_LIMITED = Response(
+    content=b'{"detail":"Too many requests"}',
+    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+    media_type="application/json",
+)
+
 
 def add_cors_middleware(app):
     """Add CORS middleware to the application."""
     settings = get_settings()
+
+    # A bare "*" would admit every origin with credentials; it is dropped,
+    # and only explicitly listed origins are allowed
+    if "*" in settings.CORS_ORIGINS_SET:
+        logger.warning(
+            "Ignoring '*' in CORS_ORIGINS: credentials are enabled, so list the "
+            "allowed origins (wildcards such as https://*.credify.ai are accepted)"
+        )
+
+    # Exact origins stay in a frozenset, so Starlette's per-request
+    # "origin in allow_origins" is a hash lookup; only the entries that
+    # contain wildcards are folded into one regex that Starlette compiles once
+    origins = frozenset(origin for origin in settings.CORS_ORIGINS_SET if "*" not in origin)
+    wildcards = sorted(
+        origin for origin in settings.CORS_ORIGINS_SET if "*" in origin and origin != "*"
+    )
+    allow_origin_regex = None
+    if wildcards:
+        allow_origin_regex = "|".join(
+            re.escape(origin).replace(r"\*", ".*") for origin in wildcards
+        )
+
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=settings.CORS_ORIGINS,
+        allow_origins=origins,
+        allow_origin_regex=allow_origin_regex,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
     )
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware."""
-
-    async def dispatch(self, request: Request, call_next):
-        """Apply rate limiting based on IP address."""
-        settings = get_settings()
-
-        # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
-
-        # Skip rate limiting for health checks
-        if request.url.path in ["/api/health", "/api/health/status"]:
-            return await call_next(request)
-
-        try:
-            # Check rate limit
-            request_count = await increment_request_count(client_ip)
-
-            if request_count > settings.RATE_LIMIT_PER_HOUR:
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={"detail": "Too many requests"},
-                )
-        except Exception as e:
-            logger.error(f"Rate limiting error: {str(e)}")
-
-        response = await call_next(request)
-        return response
-
+class UnifiedMiddleware:
+    """
+    Rate limiting, request logging and error handling in one ASGI middleware.
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Request/response logging middleware."""
+    Implemented as a plain ASGI callable rather than three BaseHTTPMiddleware
+    layers, so each request passes through a single coroutine instead of an
+    extra task group and memory stream per layer.
+    """
 
-    async def dispatch(self, request: Request, call_next):
-        """Log request and response."""
-        # Skip logging for certain paths
-        if request.url.path.startswith("/api/docs"):
-            return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        settings = get_settings()
+        self._limit = settings.RATE_LIMIT_PER_HOUR
+        self._token_bucket = settings.RATE_LIMIT_TOKEN_BUCKET
 
-        request_start_time = time.time()
-        request_body = ""
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process an ASGI connection."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Log request
+        token = request_id_var.set(uuid4().hex[:12])
         try:
-            if request.method in ["POST", "PUT", "PATCH"]:
-                body = await request.body()
-                request_body = body.decode() if body else ""
-                # Recreate the body for the actual handler
-                async def receive():
-                    return {"type": "http.request", "body": body}
-                request._receive = receive
-
-            logger.info(
-                f"Request: {request.method} {request.url.path} - "
-                f"Client: {request.client.host if request.client else 'unknown'}"
+            await self._handle(scope, receive, send)
+        finally:
+            request_id_var.reset(token)
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Rate-limit, log and run one HTTP request."""
+        path = scope["path"]
+        method = scope["method"]
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+
+        # Rate limiting (health checks are exempt)
+        if path not in _RL_SKIP and await self._is_rate_limited(client_ip):
+            await _RATE_LIMITED(scope, receive, send)
+            return
+
+        log_request = not path.startswith(_LOG_SKIP_PREFIXES)
+        request_start_ns = time.perf_counter_ns()
+        response_started = False
+
+        if log_request:
+            access_log_queue.put(
+                logger,
+                logging.INFO,
+                "Request: %s %s - Client: %s",
+                method,
+                path,
+                client_ip,
+                extra={"method": method, "path": path, "client": client_ip},
             )
-        except Exception as e:
-            logger.error(f"Error logging request: {str(e)}")
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                if log_request:
+                    elapsed_ms = (time.perf_counter_ns() - request_start_ns) / 1_000_000
+                    process_time = f"{elapsed_ms:.3f}ms"
+                    message["headers"] = [
+                        *message.get("headers", ()),
+                        (b"x-process-time", process_time.encode("latin-1")),
+                    ]
+                    access_log_queue.put(
+                        logger,
+                        logging.INFO,
+                        "Response: %s for %s %s - Time: %s",
+                        message["status"],
+                        method,
+                        path,
+                        process_time,
+                        extra={
+                            "method": method,
+                            "path": path,
+                            "status": message["status"],
+                            "process_time_ms": elapsed_ms,
+                        },
+                    )
+            await send(message)
 
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
-            return JSONResponse(
+            logger.error("Unhandled error: %s", e, exc_info=True)
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"detail": "Internal server error"},
             )
+            # Through send_wrapper, so failures are timed and logged too
+            await response(scope, receive, send_wrapper)
 
-        # Log response
-        process_time = time.time() - request_start_time
-        logger.info(
-            f"Response: {response.status_code} for {request.method} "
-            f"{request.url.path} - Time: {process_time:.3f}s"
-        )
-
-        # Add process time header
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
-
-
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    """Error handling middleware."""
-
-    async def dispatch(self, request: Request, call_next):
-        """Handle errors gracefully."""
+    async def _is_rate_limited(self, client_ip: str) -> bool:
+        """Check the configured rate limiter for a client IP."""
         try:
-            response = await call_next(request)
-            return response
-        except HTTPException:
-            raise
+            if self._token_bucket:
+                return not await token_bucket_consume(
+                    client_ip, rate=self._limit / 3600, capacity=self._limit
+                )
+            request_count = await check_rate_limit(client_ip, self._limit)
+            return request_count > self._limit
         except Exception as e:
-            logger.error(f"Unhandled error: {str(e)}", exc_info=True)
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "Internal server error"},
-            )
+            logger.error("Rate limiting error: %s", e)
+            return False
 
 
 def setup_middleware(app):
     """Setup all middleware."""
     # Order matters - add in reverse order of execution
     add_cors_middleware(app)
-    app.add_middleware(ErrorHandlingMiddleware)
-    app.add_middleware(LoggingMiddleware)
-    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(UnifiedMiddleware)
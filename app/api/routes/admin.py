@@ -1,9 +1,14 @@
 """Admin dashboard routes."""
 from fastapi import APIRouter, Depends, HTTPException, status, WebSocket
 from app.core.database import get_db
-from app.core.dependencies import get_current_admin
-from motor.motor_asyncio import AsyncDatabase
+from app.core.dependencies import get_current_admin, CurrentUser
+from app.services.fraud_broker import broker, next_batch
+from pymongo.asynchronous.database import AsyncDatabase
+from starlette.websockets import WebSocketState
+from typing import Optional
+import asyncio
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -12,7 +17,7 @@ router = APIRouter()
 @router.get("/fraud-feed")
 async def get_fraud_feed(
     limit: int = 50,
-    current_user: dict = Depends(get_current_admin),
+    current_user: CurrentUser = Depends(get_current_admin),
     db: AsyncDatabase = Depends(get_db),
 ):
     """Get recent fraud incidents."""
@@ -23,7 +28,7 @@ async def get_fraud_feed(
 async def get_analytics(
     start_date: str = None,
     end_date: str = None,
-    current_user: dict = Depends(get_current_admin),
+    current_user: CurrentUser = Depends(get_current_admin),
     db: AsyncDatabase = Depends(get_db),
 ):
     """Get analytics dashboard data."""
@@ -42,7 +47,7 @@ async def get_manual_review_queue(
     confidence_max: int = 80,
     page: int = 1,
     limit: int = 20,
-    current_user: dict = Depends(get_current_admin),
+    current_user: CurrentUser = Depends(get_current_admin),
     db: AsyncDatabase = Depends(get_db),
 ):
     """Get manual review queue (suspicious verifications)."""
@@ -54,7 +59,7 @@ async def list_users(
     role: str = None,
     page: int = 1,
     limit: int = 10,
-    current_user: dict = Depends(get_current_admin),
+    current_user: CurrentUser = Depends(get_current_admin),
     db: AsyncDatabase = Depends(get_db),
 ):
     """List platform users."""
@@ -65,7 +70,7 @@ async def list_users(
 async def disable_user(
     user_id: str,
     reason: str = None,
-    current_user: dict = Depends(get_current_admin),
+    current_user: CurrentUser = Depends(get_current_admin),
     db: AsyncDatabase = Depends(get_db),
 ):
     """Disable a user account."""
@@ -75,22 +80,42 @@ async def disable_user(
 @router.websocket("/fraud-stream")
 async def fraud_stream(
     websocket: WebSocket,
-    current_user: dict = Depends(get_current_admin),
+    current_user: CurrentUser = Depends(get_current_admin),
 ):
     """
     WebSocket endpoint for real-time fraud detection feed.
     Admin receives live updates when fraud is detected.
     """
     await websocket.accept()
+    queue = broker.subscribe()
+    receive: Optional[asyncio.Task] = None
+    batch: Optional[asyncio.Task] = None
     try:
+        await websocket.send_bytes(orjson.dumps({
+            "event": "connected",
+            "message": "Connected to fraud feed"
+        }))
+        # Listen for the client alongside the feed, so a disconnect drops the
+        # queue at once instead of on the next send
+        receive = asyncio.create_task(websocket.receive())
+        batch = asyncio.create_task(next_batch(queue))
         while True:
-            data = await websocket.receive_json()
-            # Handle messages from admin
-            await websocket.send_json({
-                "event": "connected",
-                "message": "Connected to fraud feed"
-            })
+            done, _ = await asyncio.wait({receive, batch}, return_when=asyncio.FIRST_COMPLETED)
+            if receive in done:
+                if receive.result()["type"] == "websocket.disconnect":
+                    break
+                # Client frames carry nothing for this feed
+                receive = asyncio.create_task(websocket.receive())
+            if batch in done:
+                # One frame per batch of events rather than one per event
+                await websocket.send_bytes(orjson.dumps(batch.result()))
+                batch = asyncio.create_task(next_batch(queue))
     except Exception as e:
         logger.error(f"Fraud stream error: {str(e)}")
     finally:
-        await websocket.close()
+        broker.unsubscribe(queue)
+        for task in (receive, batch):
+            if task is not None:
+                task.cancel()
+        if websocket.client_state != WebSocketState.DISCONNECTED:
+            await websocket.close()
@@ -1,11 +1,13 @@
 """Authentication routes."""
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.core.database import get_db
-from app.core.redis_client import get_redis, add_token_to_blacklist
-from app.core.dependencies import get_current_user
+from app.core.redis_client import add_token_to_blacklist
+from app.core.dependencies import get_current_user, CurrentUser
+from app.core.security import create_access_token
+from app.core.token_blacklist import token_blacklist
 from app.services.auth_service import AuthService
 from app.models.user import UserCreate, UserLogin, TokenResponse
-from motor.motor_asyncio import AsyncDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 import logging
 from datetime import timedelta
 
@@ -93,7 +95,7 @@ async def login(
 
 @router.post("/refresh")
 async def refresh_token(
-    current_user: dict = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncDatabase = Depends(get_db),
 ):
     """
@@ -101,16 +103,14 @@ async def refresh_token(
 
     Returns a new access token with 15-minute expiry.
     """
-    from app.core.security import create_access_token
-
     try:
-        user_id = current_user.get("user_id")
-        email = current_user.get("email")
-        role = current_user.get("role")
+        user_id = current_user.user_id
+        email = current_user.email
+        role = current_user.role
 
         # Verify user still exists and is active
         auth_service = AuthService(db)
-        user = await auth_service.get_user_by_id(user_id)
+        user = await auth_service.get_user_by_id(user_id, projection={"is_active": 1})
         if not user or not user.get("is_active"):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -134,20 +134,20 @@ async def refresh_token(
 
 
 @router.post("/logout")
-async def logout(current_user: dict = Depends(get_current_user)):
+async def logout(current_user: CurrentUser = Depends(get_current_user)):
     """
     Logout user by adding token to blacklist.
 
     The token will be invalid for future requests.
     """
     try:
-        token = current_user.get("token")
-        redis = get_redis()
+        token = current_user.token
 
-        # Add token to blacklist (30 days expiry)
+        # Add token to blacklist (30 days expiry) and announce it to all workers
         await add_token_to_blacklist(token, 30 * 24 * 60 * 60)
+        token_blacklist.add_local(token)
 
-        logger.info(f"User logged out: {current_user.get('email')}")
+        logger.info(f"User logged out: {current_user.email}")
         return {"message": "Logged out successfully"}
     except Exception as e:
         logger.error(f"Logout error: {str(e)}")
@@ -1,12 +1,26 @@
 """Certificate management routes."""
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_current_issuer
-from motor.motor_asyncio import AsyncDatabase
+from app.core.dependencies import get_current_user, get_current_issuer, CurrentUser
+from app.core.config import get_settings
+from app.utils.helpers import generate_certificate_id, get_file_extension
+from pymongo.asynchronous.database import AsyncDatabase
+import aiofiles
+import aiofiles.os
+import contextlib
+import hashlib
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
+settings = get_settings()
+
+# Read size for streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Certificate file types accepted for upload (lower-case extensions)
+ALLOWED_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "webp", "pdf"})
 
 
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
@@ -15,11 +29,51 @@ async def upload_certificate(
     certificate_name: str = Form(...),
     holder_name: str = Form(...),
     issue_date: str = Form(...),
-    current_user: dict = Depends(get_current_issuer),
+    current_user: CurrentUser = Depends(get_current_issuer),
     db: AsyncDatabase = Depends(get_db),
 ):
     """Upload a single certificate."""
-    return {"message": "Certificate uploaded successfully"}
+    # The client filename only picks from known extensions, so it can never
+    # add path components to the stored name
+    extension = get_file_extension(certificate_image.filename or "")
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type; allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}",
+        )
+
+    upload_dir = os.path.join(settings.LOCAL_STORAGE_PATH, "uploads")
+    await aiofiles.os.makedirs(upload_dir, exist_ok=True)
+    file_name = f"{generate_certificate_id()}.{extension}"
+    target_path = os.path.join(upload_dir, file_name)
+
+    # Stream to disk in fixed-size chunks, hashing and size-checking as we go,
+    # so the whole upload is never held in memory
+    max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    content_hash = hashlib.sha256()
+    total_bytes = 0
+    try:
+        async with aiofiles.open(target_path, "wb") as out:
+            while chunk := await certificate_image.read(UPLOAD_CHUNK_SIZE):
+                total_bytes += len(chunk)
+                if total_bytes > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File exceeds {settings.MAX_UPLOAD_SIZE_MB} MB limit",
+                    )
+                content_hash.update(chunk)
+                await out.write(chunk)
+    except Exception:
+        # The file may never have been created; keep the original error
+        with contextlib.suppress(FileNotFoundError):
+            await aiofiles.os.remove(target_path)
+        raise
+
+    return {
+        "message": "Certificate uploaded successfully",
+        "file_hash": content_hash.hexdigest(),
+        "size": total_bytes,
+    }
 
 
 @router.get("/{certificate_id}")
@@ -35,7 +89,7 @@ async def get_certificate(
 async def list_certificates(
     page: int = 1,
     limit: int = 10,
-    current_user: dict = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncDatabase = Depends(get_db),
 ):
     """List user's certificates."""
@@ -55,7 +109,7 @@ async def download_certificate_pdf(
 async def revoke_certificate(
     certificate_id: str,
     reason: str = Form(...),
-    current_user: dict = Depends(get_current_issuer),
+    current_user: CurrentUser = Depends(get_current_issuer),
     db: AsyncDatabase = Depends(get_db),
 ):
     """Revoke a certificate."""
@@ -66,7 +120,7 @@ async def revoke_certificate(
 async def share_certificate(
     certificate_id: str,
     emails: list[str] = Form(...),
-    current_user: dict = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncDatabase = Depends(get_db),
 ):
     """Share certificate with others via email."""
@@ -1,14 +1,37 @@
 """Health check routes."""
 from fastapi import APIRouter, Depends
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.redis_client import get_redis
-from motor.motor_asyncio import AsyncDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from redis.asyncio import Redis
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
+settings = get_settings()
+
+
+async def _check_mongo(db: AsyncDatabase) -> Tuple[str, str]:
+    """Ping MongoDB."""
+    try:
+        await db.client.admin.command("ping")
+        return "database", "connected"
+    except Exception as e:
+        logger.error(f"Database health check failed: {str(e)}")
+        return "database", "error"
+
+
+async def _check_redis() -> Tuple[str, str]:
+    """Ping Redis."""
+    try:
+        await get_redis().ping()
+        return "redis", "connected"
+    except Exception as e:
+        logger.error(f"Redis health check failed: {str(e)}")
+        return "redis", "error"
 
 
 @router.get("")
@@ -19,7 +42,7 @@ async def health_check() -> Dict[str, str]:
 
 @router.get("/status")
 async def service_status(
-    db: AsyncDatabase = Depends(lambda: get_db()),
+    db: AsyncDatabase = Depends(get_db),
 ) -> Dict[str, Any]:
     """
     Check status of all services.
@@ -33,34 +56,25 @@ async def service_status(
         "uptime_hours": 0.0,
     }
 
-    # Check database
-    try:
-        admin_db = db.client.admin
-        await admin_db.command("ping")
-        status_info["database"] = "connected"
-    except Exception as e:
-        logger.error(f"Database health check failed: {str(e)}")
-        status_info["database"] = "error"
-
-    # Check Redis
-    try:
-        redis_client = get_redis()
-        await redis_client.ping()
-        status_info["redis"] = "connected"
-    except Exception as e:
-        logger.error(f"Redis health check failed: {str(e)}")
-        status_info["redis"] = "error"
+    # Database and Redis probes are independent, so run them concurrently
+    results = await asyncio.gather(
+        _check_mongo(db),
+        _check_redis(),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, tuple):
+            key, value = result
+            status_info[key] = value
 
     # Gemini API availability (assume available if configured)
-    from app.core.config import get_settings
-    settings = get_settings()
     if settings.GEMINI_API_KEY:
         status_info["gemini_api"] = "available"
     else:
         status_info["gemini_api"] = "unavailable"
 
     # Blockchain availability (assume available if configured)
-    if settings.CONTRACT_ADDRESS and settings.WEB3_PRIVATE_KEY:
+    if settings.blockchain.CONTRACT_ADDRESS and settings.blockchain.WEB3_PRIVATE_KEY:
         status_info["blockchain"] = "available"
     else:
         status_info["blockchain"] = "unavailable"
@@ -70,7 +84,7 @@ async def service_status(
 
 @router.get("/ready")
 async def readiness_check(
-    db: AsyncDatabase = Depends(lambda: get_db()),
+    db: AsyncDatabase = Depends(get_db),
 ) -> Dict[str, bool]:
     """
     Readiness check for Kubernetes probes.
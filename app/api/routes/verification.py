@@ -1,20 +1,27 @@
 """Certificate verification routes."""
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, WebSocket
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from app.core.database import get_db
-from app.core.dependencies import get_optional_user
-from motor.motor_asyncio import AsyncDatabase
+from app.core.dependencies import get_optional_user, CurrentUser
+from pymongo.asynchronous.database import AsyncDatabase
+from typing import Any, Optional
+import asyncio
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Max frames, and max wait between frames, coalesced into one stream ack
+WS_BATCH_SIZE = 32
+WS_BATCH_WAIT = 0.005
+
 
 @router.post("/verify")
 async def verify_certificate(
     certificate_image: UploadFile = File(None),
     certificate_id: str = Form(None),
     verifier_email: str = Form(None),
-    current_user: dict = Depends(get_optional_user),
+    current_user: Optional[CurrentUser] = Depends(get_optional_user),
     db: AsyncDatabase = Depends(get_db),
 ):
     """
@@ -44,29 +51,65 @@ async def verification_history(
     certificate_id: str = None,
     page: int = 1,
     limit: int = 10,
-    current_user: dict = Depends(get_optional_user),
+    current_user: Optional[CurrentUser] = Depends(get_optional_user),
     db: AsyncDatabase = Depends(get_db),
 ):
     """Get verification history for a certificate."""
     return {"verifications": [], "total": 0, "page": page, "limit": limit}
 
 
+async def _receive_frame(websocket: WebSocket) -> Any:
+    """Read one JSON frame, sent as either a binary or a text message."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    return orjson.loads(message.get("bytes") or message["text"])
+
+
 @router.websocket("/stream")
 async def verification_stream(websocket: WebSocket):
     """
     WebSocket endpoint for real-time verification updates.
     Client subscribes to a verification_id and receives layer-by-layer progress.
+
+    Each subscribe is acknowledged with its own ``{"event": "subscribed"}``
+    text frame. Clients that connect with ``?batch=1`` instead get the acks
+    for frames sent back-to-back in one binary ``{"events": [...]}`` frame.
     """
     await websocket.accept()
+    batched = websocket.query_params.get("batch") == "1"
+    batch_size = WS_BATCH_SIZE if batched else 1
+    receive: Optional[asyncio.Task] = None
     try:
+        # One receive is always outstanding; the drain below only waits on
+        # it, so a timeout never cancels a read that is taking a frame
+        receive = asyncio.create_task(_receive_frame(websocket))
         while True:
-            data = await websocket.receive_json()
-            if data.get("action") == "subscribe":
-                await websocket.send_json({
-                    "event": "subscribed",
-                    "verification_id": data.get("verification_id")
-                })
+            batch = [await receive]
+            receive = asyncio.create_task(_receive_frame(websocket))
+            while len(batch) < batch_size:
+                done, _ = await asyncio.wait({receive}, timeout=WS_BATCH_WAIT)
+                if not done:
+                    break
+                batch.append(receive.result())
+                receive = asyncio.create_task(_receive_frame(websocket))
+
+            # Frames that are not JSON objects carry no action and are ignored
+            acks = [
+                {"event": "subscribed", "verification_id": data.get("verification_id")}
+                for data in batch
+                if isinstance(data, dict) and data.get("action") == "subscribe"
+            ]
+            if not acks:
+                continue
+            if batched:
+                await websocket.send_bytes(orjson.dumps({"events": acks}))
+            else:
+                for ack in acks:
+                    await websocket.send_text(orjson.dumps(ack).decode())
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
     finally:
+        if receive is not None:
+            receive.cancel()
         await websocket.close()
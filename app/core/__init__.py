@@ -1,37 +1,44 @@
-"""Core application module."""
-from app.core.config import get_settings, Settings
-from app.core.database import connect_db, disconnect_db, get_db
-from app.core.redis_client import connect_redis, disconnect_redis, get_redis
-from app.core.security import (
-    hash_password,
-    verify_password,
-    create_access_token,
-    create_refresh_token,
-    decode_token,
-    validate_password_strength,
-)
-from app.core.dependencies import (
-    get_current_user,
-    get_current_admin,
-    get_optional_user,
-)
+"""Core application module.
 
-__all__ = [
-    "get_settings",
-    "Settings",
-    "connect_db",
-    "disconnect_db",
-    "get_db",
-    "connect_redis",
-    "disconnect_redis",
-    "get_redis",
-    "hash_password",
-    "verify_password",
-    "create_access_token",
-    "create_refresh_token",
-    "decode_token",
-    "validate_password_strength",
-    "get_current_user",
-    "get_current_admin",
-    "get_optional_user",
-]
+Exports are resolved lazily (PEP 562) so that importing any ``app.core``
+submodule does not pull in PyMongo, Redis and the auth stack up front.
+"""
+import importlib
+
+# Exported name -> submodule that defines it
+_lazy_map = {
+    "get_settings": "app.core.config",
+    "Settings": "app.core.config",
+    "connect_db": "app.core.database",
+    "disconnect_db": "app.core.database",
+    "get_db": "app.core.database",
+    "connect_redis": "app.core.redis_client",
+    "disconnect_redis": "app.core.redis_client",
+    "get_redis": "app.core.redis_client",
+    "hash_password": "app.core.security",
+    "verify_password": "app.core.security",
+    "create_access_token": "app.core.security",
+    "create_refresh_token": "app.core.security",
+    "decode_token": "app.core.security",
+    "validate_password_strength": "app.core.security",
+    "get_current_user": "app.core.dependencies",
+    "get_current_admin": "app.core.dependencies",
+    "get_optional_user": "app.core.dependencies",
+}
+
+__all__ = list(_lazy_map)
+
+
+def __getattr__(name: str):
+    """Import the defining submodule on first access and cache the attribute."""
+    try:
+        module = _lazy_map[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,58 @@
+"""Coalesce concurrent single-key lookups into one batched call."""
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+import asyncio
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchQueue(Generic[K, V]):
+    """
+    Collect ``load(key)`` calls for a short window and serve them with one
+    ``loader(keys)`` call.
+
+    ``loader`` receives the distinct keys queued during the window and
+    returns a mapping of key to result; keys missing from the mapping
+    resolve to ``default``. If the loader raises, every waiting caller
+    receives the exception.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        window: float = 0.005,
+        default: Optional[V] = None,
+    ):
+        self._loader = loader
+        self._window = window
+        self._default = default
+        self._pending: Dict[K, List[asyncio.Future]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def load(self, key: K) -> V:
+        """Queue ``key`` for the next batch and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(key, []).append(future)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self._window)
+        pending, self._pending = self._pending, {}
+        self._flush_task = None
+
+        try:
+            results: Dict[K, Any] = await self._loader(list(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in pending.items():
+            result = results.get(key, self._default)
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
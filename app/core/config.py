@@ -8,15 +8,123 @@ Environment variables can be set in .env file or via system environment.
 For production, ensure all sensitive values are properly set.
 """
 
-from pydantic_settings import BaseSettings
-from pydantic import Field, field_validator
-from typing import List
-from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, computed_field, field_validator
+from typing import FrozenSet, Tuple
+from functools import cached_property
+import json
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+__all__ = [
+    "Settings",
+    "BlockchainSettings",
+    "SMTPSettings",
+    "PaymentSettings",
+    "S3Settings",
+    "settings",
+    "dump_settings_cache",
+    "get_settings",
+    "get_settings_dict",
+    "validate_production_settings",
+]
+
+VALID_ENVIRONMENTS = frozenset({"development", "staging", "production"})
+
+# Validated settings written at deploy time by scripts/build_env_cache.py
+ENV_FILE = ".env"
+ENV_CACHE_FILE = ".env.cache.json"
+
+
+_SETTINGS_CONFIG = SettingsConfigDict(
+    env_file=ENV_FILE,
+    case_sensitive=True,
+    extra="ignore",
+    frozen=True,
+)
+
+
+class BlockchainSettings(BaseSettings):
+    """Polygon / Web3 settings (loaded on first access to ``Settings.blockchain``)."""
+
+    model_config = _SETTINGS_CONFIG
+
+    POLYGON_RPC_URL: str = Field(
+        default="https://rpc-mumbai.maticvigil.com",
+        description="Polygon Mumbai RPC endpoint"
+    )
+    CONTRACT_ADDRESS: str = Field(
+        default="",
+        description="Smart contract address on Polygon Mumbai"
+    )
+    WEB3_PRIVATE_KEY: str = Field(
+        default="",
+        description="Private key for blockchain transactions"
+    )
+
+
+class SMTPSettings(BaseSettings):
+    """Outgoing email settings (loaded on first access to ``Settings.smtp``)."""
+
+    model_config = _SETTINGS_CONFIG
+
+    SMTP_HOST: str = Field(
+        default="smtp.gmail.com",
+        description="SMTP server host"
+    )
+    SMTP_PORT: int = Field(
+        default=587,
+        description="SMTP server port"
+    )
+    SMTP_USER: str = Field(
+        default="",
+        description="SMTP authentication username"
+    )
+    SMTP_PASSWORD: str = Field(
+        default="",
+        description="SMTP authentication password"
+    )
+    SMTP_FROM_EMAIL: str = Field(
+        default="noreply@credify.ai",
+        description="Email address to send from"
+    )
+    SMTP_FROM_NAME: str = Field(
+        default="Credify",
+        description="Display name for emails"
+    )
+
+
+class PaymentSettings(BaseSettings):
+    """Razorpay settings (loaded on first access to ``Settings.payment``)."""
+
+    model_config = _SETTINGS_CONFIG
+
+    RAZORPAY_KEY_ID: str = Field(
+        default="",
+        description="Razorpay API key ID"
+    )
+    RAZORPAY_KEY_SECRET: str = Field(
+        default="",
+        description="Razorpay API secret"
+    )
+
+
+class S3Settings(BaseSettings):
+    """AWS S3 storage settings (loaded on first access to ``Settings.s3``)."""
+
+    model_config = _SETTINGS_CONFIG
+
+    S3_BUCKET: str = Field(
+        default="",
+        description="AWS S3 bucket name"
+    )
+    S3_REGION: str = Field(
+        default="us-east-1",
+        description="AWS S3 region"
+    )
+
 
 class Settings(BaseSettings):
     """
@@ -52,12 +160,36 @@ class Settings(BaseSettings):
         default="credify",
         description="MongoDB database name"
     )
+    MONGO_MAX_POOL: int = Field(
+        default=200,
+        description="Maximum MongoDB connections per worker"
+    )
+    MONGO_MIN_POOL: int = Field(
+        default=20,
+        description="MongoDB connections kept open per worker when idle"
+    )
+    MONGO_COMPRESSORS: str = Field(
+        default="zstd,zlib",
+        description="Wire compressors to offer MongoDB, in order of preference"
+    )
+    RUN_MIGRATIONS: bool = Field(
+        default=True,
+        description="Create MongoDB indexes in the background at startup"
+    )
 
     # ==================== CACHE SETTINGS ====================
     REDIS_URL: str = Field(
         default="redis://localhost:6379",
         description="Redis connection URL"
     )
+    REDIS_MAX_POOL: int = Field(
+        default=50,
+        description="Maximum Redis connections per worker"
+    )
+    REDIS_HEALTH_CHECK_INTERVAL: int = Field(
+        default=30,
+        description="Seconds a Redis connection may idle before it is health-checked"
+    )
 
     # ==================== JWT AUTHENTICATION ====================
     JWT_SECRET: str = Field(
@@ -76,6 +208,11 @@ class Settings(BaseSettings):
         default=7,
         description="Refresh token expiration time in days"
     )
+    TOKEN_BLACKLIST_REFRESH_SECONDS: int = Field(
+        default=900,
+        gt=0,
+        description="How often each worker rebuilds its revoked-token filter from Redis"
+    )
 
     # ==================== SECURITY SETTINGS ====================
     ARGON2_TIME_COST: int = Field(
@@ -86,31 +223,45 @@ class Settings(BaseSettings):
         default=65536,
         description="Argon2 memory cost parameter (in KB)"
     )
+    ARGON2_PARALLELISM: int = Field(
+        default=2,
+        description="Argon2 parallelism (threads per hash)"
+    )
     PASSWORD_MIN_LENGTH: int = Field(
         default=8,
         description="Minimum password length requirement"
     )
 
     # ==================== API & CORS SETTINGS ====================
-    CORS_ORIGINS: List[str] = Field(
-        default=[
+    CORS_ORIGINS: Tuple[str, ...] = Field(
+        default=(
             "http://localhost:3000",
             "http://localhost:5173",
             "http://127.0.0.1:3000",
             "http://127.0.0.1:5173",
-        ],
-        description="Allowed CORS origins"
+        ),
+        description="Allowed CORS origins ('*' wildcards allowed, e.g. https://*.credify.ai; a bare '*' is ignored)"
     )
     API_PREFIX: str = Field(
         default="/api",
         description="API prefix for all routes"
     )
 
+    @computed_field
+    @cached_property
+    def CORS_ORIGINS_SET(self) -> FrozenSet[str]:
+        """CORS origins as a set, for hash lookups on every preflight."""
+        return frozenset(self.CORS_ORIGINS)
+
     # ==================== RATE LIMITING ====================
     RATE_LIMIT_PER_HOUR: int = Field(
         default=100,
         description="Rate limit: requests per hour per IP"
     )
+    RATE_LIMIT_TOKEN_BUCKET: bool = Field(
+        default=False,
+        description="Use the O(1) token bucket instead of the rolling window"
+    )
 
     # ==================== AI & ML SERVICES ====================
     GEMINI_API_KEY: str = Field(
@@ -125,55 +276,32 @@ class Settings(BaseSettings):
         default=30,
         description="Gemini API timeout in seconds"
     )
-
-    # ==================== BLOCKCHAIN SETTINGS ====================
-    POLYGON_RPC_URL: str = Field(
-        default="https://rpc-mumbai.maticvigil.com",
-        description="Polygon Mumbai RPC endpoint"
-    )
-    CONTRACT_ADDRESS: str = Field(
-        default="",
-        description="Smart contract address on Polygon Mumbai"
-    )
-    WEB3_PRIVATE_KEY: str = Field(
-        default="",
-        description="Private key for blockchain transactions"
-    )
-
-    # ==================== EMAIL SETTINGS ====================
-    SMTP_HOST: str = Field(
-        default="smtp.gmail.com",
-        description="SMTP server host"
-    )
-    SMTP_PORT: int = Field(
-        default=587,
-        description="SMTP server port"
-    )
-    SMTP_USER: str = Field(
-        default="",
-        description="SMTP authentication username"
+    GEMINI_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Cache Gemini results in Redis by image content hash"
     )
-    SMTP_PASSWORD: str = Field(
-        default="",
-        description="SMTP authentication password"
+    GEMINI_CACHE_TTL: int = Field(
+        default=86400,
+        description="Gemini result cache TTL in seconds"
     )
-    SMTP_FROM_EMAIL: str = Field(
-        default="noreply@credify.ai",
-        description="Email address to send from"
+    GEMINI_BATCH_TIMEOUT: int = Field(
+        default=3600,
+        description="How long bulk verification waits for a Gemini batch job, in seconds"
     )
-    SMTP_FROM_NAME: str = Field(
-        default="Credify",
-        description="Display name for emails"
+    ELA_PROCESS_WORKERS: int = Field(
+        default=2,
+        ge=0,
+        description="Worker processes for Error Level Analysis (0 = run in the server process)"
     )
-
-    # ==================== PAYMENT SETTINGS ====================
-    RAZORPAY_KEY_ID: str = Field(
+    LOCAL_VISION_MODEL_PATH: str = Field(
         default="",
-        description="Razorpay API key ID"
+        description="ONNX certificate classifier run before Gemini (empty = disabled; needs onnxruntime)"
     )
-    RAZORPAY_KEY_SECRET: str = Field(
-        default="",
-        description="Razorpay API secret"
+    LOCAL_VISION_CONFIDENCE: float = Field(
+        default=0.9,
+        ge=0.0,
+        le=1.0,
+        description="Local classifier confidence at which the Gemini call is skipped"
     )
 
     # ==================== STORAGE SETTINGS ====================
@@ -185,13 +313,9 @@ class Settings(BaseSettings):
         default="./storage",
         description="Local storage directory path"
     )
-    S3_BUCKET: str = Field(
-        default="",
-        description="AWS S3 bucket name"
-    )
-    S3_REGION: str = Field(
-        default="us-east-1",
-        description="AWS S3 region"
+    MAX_UPLOAD_SIZE_MB: int = Field(
+        default=10,
+        description="Maximum certificate upload size in megabytes"
     )
 
     # ==================== FEATURE FLAGS ====================
@@ -208,9 +332,30 @@ class Settings(BaseSettings):
         description="Enable demo mode with sample data"
     )
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = _SETTINGS_CONFIG
+
+    # ==================== INTEGRATION SETTINGS ====================
+    # Read from the environment only when first used; most requests never
+    # touch these credentials.
+    @cached_property
+    def blockchain(self) -> BlockchainSettings:
+        """Polygon / Web3 settings."""
+        return BlockchainSettings()
+
+    @cached_property
+    def smtp(self) -> SMTPSettings:
+        """Outgoing email settings."""
+        return SMTPSettings()
+
+    @cached_property
+    def payment(self) -> PaymentSettings:
+        """Razorpay settings."""
+        return PaymentSettings()
+
+    @cached_property
+    def s3(self) -> S3Settings:
+        """AWS S3 storage settings."""
+        return S3Settings()
 
     @field_validator("JWT_SECRET")
     @classmethod
@@ -248,9 +393,8 @@ class Settings(BaseSettings):
         Raises:
             ValueError: If environment is invalid
         """
-        valid_environments = {"development", "staging", "production"}
-        if v not in valid_environments:
-            raise ValueError(f"ENVIRONMENT must be one of {valid_environments}")
+        if v not in VALID_ENVIRONMENTS:
+            raise ValueError(f"ENVIRONMENT must be one of {set(VALID_ENVIRONMENTS)}")
         return v
 
     @field_validator("PASSWORD_MIN_LENGTH")
@@ -273,13 +417,70 @@ class Settings(BaseSettings):
         return v
 
 
-@lru_cache()
+def _load_cached_settings() -> Settings | None:
+    """
+    Load settings from ENV_CACHE_FILE if it is at least as new as ENV_FILE.
+
+    The cache only stands in for ENV_FILE: it is skipped when any settings
+    field is also set in the process environment, which must win. The
+    cached values are validated like any other input, without re-reading
+    the environment or ENV_FILE. Returns None when there is no usable cache.
+    """
+    try:
+        cache_mtime = os.path.getmtime(ENV_CACHE_FILE)
+    except OSError:
+        return None
+    if os.path.exists(ENV_FILE) and os.path.getmtime(ENV_FILE) > cache_mtime:
+        logger.warning(f"{ENV_CACHE_FILE} is older than {ENV_FILE}; ignoring it")
+        return None
+    overridden = sorted(name for name in Settings.model_fields if name in os.environ)
+    if overridden:
+        logger.info(f"Ignoring {ENV_CACHE_FILE}: set in the environment: {', '.join(overridden)}")
+        return None
+
+    try:
+        with open(ENV_CACHE_FILE, "rb") as f:
+            data = json.load(f)
+        return Settings.model_validate(data)
+    except Exception as e:
+        logger.warning(f"Failed to read {ENV_CACHE_FILE}: {str(e)}")
+        return None
+
+
+def dump_settings_cache(loaded: Settings, path: str = ENV_CACHE_FILE) -> None:
+    """Write validated settings to ``path`` for ``_load_cached_settings``."""
+    data = loaded.model_dump(mode="json", exclude={"CORS_ORIGINS_SET"})
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def _load_settings() -> Settings:
+    """Load settings from the environment, logging any validation failure."""
+    cached = _load_cached_settings()
+    if cached is not None:
+        logger.info(f"Settings loaded from {ENV_CACHE_FILE} for {cached.ENVIRONMENT} environment")
+        return cached
+
+    try:
+        loaded = Settings()
+        logger.info(f"Settings loaded successfully for {loaded.ENVIRONMENT} environment")
+        return loaded
+    except Exception as e:
+        logger.error(f"Failed to load settings: {str(e)}")
+        raise
+
+
+# Application settings, loaded once at import. Settings are frozen, so this
+# instance can be imported directly: ``from app.core.config import settings``
+settings: Settings = _load_settings()
+
+
 def get_settings() -> Settings:
     """
-    Get application settings (cached).
+    Get application settings.
 
-    This function uses LRU caching to ensure settings are only loaded once.
-    Subsequent calls return the cached instance.
+    Kept for existing callers and ``Depends(get_settings)``; new code can
+    import the module-level ``settings`` instead.
 
     Returns:
         Settings: The application settings object
@@ -289,13 +490,7 @@ def get_settings() -> Settings:
         >>> print(settings.APP_NAME)
         'Credify'
     """
-    try:
-        settings = Settings()
-        logger.info(f"Settings loaded successfully for {settings.ENVIRONMENT} environment")
-        return settings
-    except Exception as e:
-        logger.error(f"Failed to load settings: {str(e)}")
-        raise
+    return settings
 
 
 def get_settings_dict() -> dict:
@@ -314,7 +509,13 @@ def get_settings_dict() -> dict:
     """
     try:
         settings = get_settings()
-        return settings.model_dump()
+        return {
+            **settings.model_dump(),
+            **settings.blockchain.model_dump(),
+            **settings.smtp.model_dump(),
+            **settings.payment.model_dump(),
+            **settings.s3.model_dump(),
+        }
     except Exception as e:
         logger.error(f"Failed to get settings dict: {str(e)}")
         raise
@@ -343,8 +544,8 @@ def validate_production_settings() -> bool:
         required_settings = {
             "JWT_SECRET": settings.JWT_SECRET,
             "GEMINI_API_KEY": settings.GEMINI_API_KEY,
-            "SMTP_PASSWORD": settings.SMTP_PASSWORD,
-            "CONTRACT_ADDRESS": settings.CONTRACT_ADDRESS,
+            "SMTP_PASSWORD": settings.smtp.SMTP_PASSWORD,
+            "CONTRACT_ADDRESS": settings.blockchain.CONTRACT_ADDRESS,
         }
 
         missing = [key for key, value in required_settings.items() if not value]
@@ -1,31 +1,44 @@
 """MongoDB database connection and initialization."""
-from motor.motor_asyncio import AsyncClient, AsyncDatabase
-from pymongo import ASCENDING, DESCENDING
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from app.core.config import get_settings
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-_client: AsyncClient | None = None
+_client: AsyncMongoClient | None = None
 _db: AsyncDatabase | None = None
+_index_task: asyncio.Task | None = None
 
 
 async def connect_db() -> None:
-    """Connect to MongoDB and create indexes."""
-    global _client, _db
-    settings = get_settings()
+    """Connect to MongoDB and start index creation."""
+    global _client, _db, _index_task
 
     try:
-        _client = AsyncClient(settings.MONGODB_URL)
+        _client = AsyncMongoClient(
+            settings.MONGODB_URL,
+            maxPoolSize=settings.MONGO_MAX_POOL,
+            minPoolSize=settings.MONGO_MIN_POOL,
+            waitQueueTimeoutMS=2000,
+            compressors=settings.MONGO_COMPRESSORS,
+            serverSelectionTimeoutMS=3000,
+            socketTimeoutMS=5000,
+            retryWrites=True,
+        )
         _db = _client[settings.MONGODB_DB]
 
         # Verify connection
         await _client.admin.command("ping")
         logger.info("Connected to MongoDB successfully")
 
-        # Create indexes
-        await create_indexes()
+        # Build indexes off the startup path; with RUN_MIGRATIONS disabled
+        # they are managed by `python -m migrations.migrate indexes` instead
+        if settings.RUN_MIGRATIONS:
+            _index_task = asyncio.create_task(_create_indexes_background())
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {str(e)}")
         raise
@@ -33,54 +46,65 @@ async def connect_db() -> None:
 
 async def disconnect_db() -> None:
     """Disconnect from MongoDB."""
-    global _client
+    global _client, _index_task
+    if _index_task and not _index_task.done():
+        _index_task.cancel()
+    _index_task = None
     if _client:
-        _client.close()
+        await _client.close()
         logger.info("Disconnected from MongoDB")
 
 
-async def create_indexes() -> None:
+# Required indexes per collection
+INDEXES = {
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("institution_id"),
+        IndexModel("is_active"),
+        IndexModel("created_at"),
+    ],
+    # Compound indexes follow the listing queries (owner, newest first); their
+    # prefixes also serve plain owner lookups, so no single-field duplicates
+    "certificates": [
+        IndexModel("certificate_id", unique=True),
+        IndexModel([("issuer_id", ASCENDING), ("is_revoked", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("student_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("institution_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel("holder_name"),
+        # Candidate lookup for the fraud pipeline's fuzzy database check
+        IndexModel([("holder_name", TEXT), ("institution_id", TEXT)]),
+    ],
+    "verifications": [
+        IndexModel("verification_id", unique=True),
+        IndexModel([("certificate_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel("confidence_score"),
+    ],
+    "institutions": [
+        IndexModel("name", unique=True),
+        IndexModel("code", unique=True),
+        IndexModel("email_domain"),
+    ],
+    "fraud_incidents": [
+        IndexModel("certificate_id"),
+        IndexModel("created_at"),
+        IndexModel("ip_address"),
+        IndexModel([("geolocation.latitude", ASCENDING), ("geolocation.longitude", ASCENDING)]),
+    ],
+}
+
+
+async def create_indexes(db: AsyncDatabase | None = None) -> None:
     """Create all required indexes in MongoDB collections."""
-    if not _db:
+    db = _db if db is None else db
+    if db is None:
         return
 
     try:
-        # Users collection indexes
-        users_col = _db["users"]
-        await users_col.create_index("email", unique=True)
-        await users_col.create_index("institution_id")
-        await users_col.create_index("is_active")
-        await users_col.create_index("created_at")
-
-        # Certificates collection indexes
-        certs_col = _db["certificates"]
-        await certs_col.create_index("certificate_id", unique=True)
-        await certs_col.create_index("issuer_id")
-        await certs_col.create_index("student_id")
-        await certs_col.create_index("institution_id")
-        await certs_col.create_index("is_revoked")
-        await certs_col.create_index("created_at")
-        await certs_col.create_index("holder_name")
-
-        # Verifications collection indexes
-        verif_col = _db["verifications"]
-        await verif_col.create_index("verification_id", unique=True)
-        await verif_col.create_index("certificate_id")
-        await verif_col.create_index("created_at")
-        await verif_col.create_index("confidence_score")
-
-        # Institutions collection indexes
-        inst_col = _db["institutions"]
-        await inst_col.create_index("name", unique=True)
-        await inst_col.create_index("code", unique=True)
-        await inst_col.create_index("email_domain")
-
-        # Fraud Incidents collection indexes
-        fraud_col = _db["fraud_incidents"]
-        await fraud_col.create_index("certificate_id")
-        await fraud_col.create_index("created_at")
-        await fraud_col.create_index("ip_address")
-        await fraud_col.create_index([("geolocation.latitude", ASCENDING), ("geolocation.longitude", ASCENDING)])
+        # One createIndexes command per collection, all collections in parallel
+        await asyncio.gather(*(
+            db[collection].create_indexes(models)
+            for collection, models in INDEXES.items()
+        ))
 
         logger.info("Indexes created successfully")
     except Exception as e:
@@ -88,6 +112,15 @@ async def create_indexes() -> None:
         raise
 
 
+async def _create_indexes_background() -> None:
+    """Run create_indexes as a startup background task."""
+    try:
+        await create_indexes()
+    except Exception:
+        # Already logged by create_indexes; the app keeps serving
+        pass
+
+
 def get_db() -> AsyncDatabase:
     """Get the MongoDB database connection."""
     if _db is None:
@@ -95,7 +128,7 @@ def get_db() -> AsyncDatabase:
     return _db
 
 
-def get_client() -> AsyncClient:
+def get_client() -> AsyncMongoClient:
     """Get the MongoDB client."""
     if _client is None:
         raise RuntimeError("Database not initialized. Call connect_db() first.")
@@ -109,11 +142,11 @@ async def get_db_context():
     try:
         yield db
     finally:
-        pass  # Motor handles connection pooling
+        pass  # The client handles connection pooling
 
 
 async def drop_db():
     """Drop the entire database (for testing/cleanup)."""
-    if _client and _db:
-        await _client.drop_database(get_settings().MONGODB_DB)
+    if _client is not None and _db is not None:
+        await _client.drop_database(settings.MONGODB_DB)
         logger.warning("Database dropped")
@@ -1,36 +1,52 @@
 """FastAPI dependencies for authentication and authorization."""
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthCredentials
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import get_token_from_header, decode_token
-from app.core.redis_client import is_token_blacklisted
+from app.core.token_blacklist import token_blacklist
+from app.core.redis_client import get_cached_user, cache_user
 from app.core.database import get_db
-from motor.motor_asyncio import AsyncDatabase
-from typing import Optional, Dict, Any
+from pymongo.asynchronous.database import AsyncDatabase
+from typing import Optional, Dict, Any, FrozenSet
 from bson import ObjectId
+from dataclasses import dataclass
+from functools import lru_cache
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+# User lookups currently in flight, so a burst of requests for one user
+# shares a single cache/database round-trip
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+@dataclass(slots=True)
+class CurrentUser:
+    """Authenticated user, built from verified JWT claims."""
+
+    user_id: str
+    role: Optional[str]
+    email: Optional[str]
+    token: str
+
+
+@lru_cache(maxsize=10_000)
+def _to_oid(user_id: str) -> ObjectId:
+    """Parse a user id once; raises for invalid ids (which are not cached)."""
+    return ObjectId(user_id)
+
 
 async def get_current_user(
-    credentials: HTTPAuthCredentials = Depends(security),
-) -> Dict[str, Any]:
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> CurrentUser:
     """
     Get current authenticated user from JWT token.
-    Raises HTTPException if token is invalid or blacklisted.
+    Raises HTTPException if token is invalid or blacklisted, or the user is disabled.
     """
     token = credentials.credentials
 
-    # Check if token is blacklisted
-    if await is_token_blacklisted(token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
     # Decode token
     payload = decode_token(token)
     if not payload:
@@ -57,42 +73,59 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return {
-        "user_id": user_id,
-        "email": payload.get("email"),
-        "role": payload.get("role"),
-        "token": token,
-    }
-
-
-async def get_current_admin(
-    current_user: Dict[str, Any] = Depends(get_current_user),
-) -> Dict[str, Any]:
-    """Get current user and verify they have admin role."""
-    if current_user.get("role") != "admin":
+    # Revoked tokens and disabled accounts are tracked in Redis, so no
+    # database lookup is needed; both are checked in one round-trip
+    token_revoked, user_revoked = await token_blacklist.check(token, user_id)
+    if token_revoked:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin access required",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-    return current_user
-
-
-async def get_current_issuer(
-    current_user: Dict[str, Any] = Depends(get_current_user),
-) -> Dict[str, Any]:
-    """Get current user and verify they have issuer role."""
-    role = current_user.get("role")
-    if role not in ["issuer", "admin"]:
+    if user_revoked:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Issuer access required",
+            detail="User account is inactive",
         )
-    return current_user
+
+    return CurrentUser(
+        user_id=user_id,
+        role=payload.get("role"),
+        email=payload.get("email"),
+        token=token,
+    )
+
+
+def require_roles(roles: FrozenSet[str], detail: str = "Insufficient permissions"):
+    """
+    Build a dependency that admits only users whose role is in ``roles``.
+
+    Call this once at import time; the returned dependency is shared by
+    every request.
+    """
+    async def _require_roles(
+        current_user: CurrentUser = Depends(get_current_user),
+    ) -> CurrentUser:
+        if current_user.role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=detail,
+            )
+        return current_user
+
+    return _require_roles
+
+
+# Get current user and verify they have admin role
+get_current_admin = require_roles(frozenset({"admin"}), "Admin access required")
+
+# Get current user and verify they have issuer (or admin) role
+get_current_issuer = require_roles(frozenset({"issuer", "admin"}), "Issuer access required")
 
 
 async def get_optional_user(
-    credentials: Optional[HTTPAuthCredentials] = Depends(security),
-) -> Optional[Dict[str, Any]]:
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+) -> Optional[CurrentUser]:
     """
     Get current user if authenticated, otherwise return None.
     Used for endpoints that support both authenticated and unauthenticated access.
@@ -102,10 +135,6 @@ async def get_optional_user(
 
     token = credentials.credentials
 
-    # Check if token is blacklisted
-    if await is_token_blacklisted(token):
-        return None
-
     # Decode token
     payload = decode_token(token)
     if not payload or payload.get("type") != "access":
@@ -115,29 +144,65 @@ async def get_optional_user(
     if not user_id:
         return None
 
-    return {
-        "user_id": user_id,
-        "email": payload.get("email"),
-        "role": payload.get("role"),
-        "token": token,
-    }
+    if any(await token_blacklist.check(token, user_id)):
+        return None
+
+    return CurrentUser(
+        user_id=user_id,
+        role=payload.get("role"),
+        email=payload.get("email"),
+        token=token,
+    )
+
+
+async def _fetch_user(
+    user_id: str,
+    user_obj_id: ObjectId,
+    db: AsyncDatabase,
+) -> Optional[Dict[str, Any]]:
+    """Load a user from the Redis cache, falling back to MongoDB."""
+    user = await get_cached_user(user_id)
+    if user is None:
+        users_col = db["users"]
+        user = await users_col.find_one(
+            {"_id": user_obj_id},
+            {"role": 1, "is_active": 1, "email": 1},
+        )
+        if user:
+            await cache_user(user_id, user)
+            user["_id"] = user_id
+    return user
 
 
 async def verify_user_exists(
     user_id: str,
     db: AsyncDatabase = Depends(get_db),
 ) -> Dict[str, Any]:
-    """Verify that a user exists in the database."""
+    """
+    Verify that a user exists and is active.
+
+    Returns the user's id, role, is_active and email, served from a short-lived
+    Redis cache when possible. Concurrent calls for the same user share one
+    lookup.
+    """
     try:
-        user_obj_id = ObjectId(user_id)
+        user_obj_id = _to_oid(user_id)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid user ID",
         )
 
-    users_col = db["users"]
-    user = await users_col.find_one({"_id": user_obj_id})
+    task = _inflight.get(user_id)
+    if task is None:
+        task = asyncio.create_task(_fetch_user(user_id, user_obj_id, db))
+        _inflight[user_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(user_id, None))
+
+    # Shielded so a cancelled request does not cancel its siblings' lookup
+    user = await asyncio.shield(task)
+    if user:
+        user = dict(user)
 
     if not user:
         raise HTTPException(
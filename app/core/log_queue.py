@@ -0,0 +1,123 @@
+"""Asynchronous batching queue for high-volume log records (access logs)."""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from app.core.request_context import request_id_var
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop() to end the drain task
+_STOP = object()
+
+
+class AsyncLogQueue:
+    """
+    Bounded queue that moves log emission off the request path.
+
+    Records are created on the request path and handed to a single background
+    task, which emits them in batches of up to ``batch_size`` records or every
+    ``flush_interval`` seconds, whichever comes first. When the queue is full
+    records are dropped and counted instead of blocking the request.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        batch_size: int = 128,
+        flush_interval: float = 0.05,
+    ):
+        """Initialize the queue (the background task is started separately)."""
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def put(
+        self,
+        target: logging.Logger,
+        level: int,
+        msg: str,
+        *args,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Queue a log record for ``target``; falls back to direct logging if not started."""
+        if not target.isEnabledFor(level):
+            return
+
+        record = target.makeRecord(
+            target.name, level, "(unknown file)", 0, msg, args, None, extra=extra
+        )
+        # Captured now: the drain task runs outside the request's context
+        record.request_id = request_id_var.get()
+
+        if self._queue is None:
+            target.handle(record)
+            return
+
+        try:
+            self._queue.put_nowait((target, record))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """Start the background drain task on the running event loop."""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self._drain())
+
+    async def stop(self) -> None:
+        """Stop the drain task after it has flushed every queued record."""
+        if self._task is None:
+            return
+
+        # A sentinel rather than cancel(): asyncio.wait_for can swallow a
+        # cancellation that races with a completed get(), and cancelling would
+        # also drop the batch being collected
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+
+        if self.dropped:
+            logger.warning("Access log queue dropped %d records", self.dropped)
+
+    async def _drain(self) -> None:
+        """Collect records into batches and emit them until the stop sentinel."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    self._emit(batch)
+                    return
+                batch.append(item)
+
+            self._emit(batch)
+
+    @staticmethod
+    def _emit(batch: list) -> None:
+        """Hand a batch of records to their loggers' handlers in one pass."""
+        for target, record in batch:
+            target.handle(record)
+
+
+# Shared access-log queue used by the request logging middleware
+access_log_queue = AsyncLogQueue()
@@ -1,47 +1,65 @@
 """Logging configuration for Credify."""
+import atexit
 import logging
 import logging.handlers
 import os
-from datetime import datetime
+import queue
+import sys
 
-# Create logs directory if it doesn't exist
+from app.core.request_context import RequestIdFilter
+
+# Logs directory (created by setup_logging, not at import)
 logs_dir = os.path.join(os.path.dirname(__file__), '../../logs')
-os.makedirs(logs_dir, exist_ok=True)
 
-# Log file path
-log_file = os.path.join(logs_dir, f'credify_{datetime.now().strftime("%Y%m%d")}.log')
+# Current log file; rotated at UTC midnight to credify.log.YYYY-MM-DD
+log_file = os.path.join(logs_dir, 'credify.log')
 
 # Logging format
 log_format = (
-    '[%(asctime)s] %(levelname)-8s [%(name)s] %(message)s'
+    '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 )
 
 # Create logger
 def setup_logging(level=logging.INFO):
     """Setup logging configuration."""
+    os.makedirs(logs_dir, exist_ok=True)
+
     # Root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
 
     # Console handler
-    console_handler = logging.StreamHandler()
+    console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(level)
     console_formatter = logging.Formatter(log_format)
     console_handler.setFormatter(console_formatter)
 
-    # File handler with rotation
-    file_handler = logging.handlers.RotatingFileHandler(
+    # File handler with daily rotation
+    file_handler = logging.handlers.TimedRotatingFileHandler(
         log_file,
-        maxBytes=10 * 1024 * 1024,  # 10MB
-        backupCount=10
+        when='midnight',
+        backupCount=10,
+        utc=True,
     )
     file_handler.setLevel(logging.DEBUG)
     file_formatter = logging.Formatter(log_format)
     file_handler.setFormatter(file_formatter)
 
+    # Loggers only enqueue records; a listener thread does the formatting
+    # and the console/file I/O (including rotation)
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Filters run in the calling thread, where the request id context var is set
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
     # Add handlers to root logger
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(queue_handler)
 
     return root_logger
 
@@ -1,180 +1,438 @@
 """Redis client for caching and sessions."""
-import redis.asyncio as redis
-from redis.asyncio import Redis
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import NoScriptError
 import logging
-from app.core.config import get_settings
-import json
-from typing import Any, Optional
+import time
+from app.core.config import settings
+import hashlib
+import orjson
+from cachetools import TTLCache
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
+# One pool per worker, shared by every command, pipeline and pub/sub
+_pool: ConnectionPool | None = None
 _redis: Redis | None = None
 
+# Rolling-window rate limiter. Trims entries older than the window, counts the
+# rest and records the current request only if it is still under the limit.
+# KEYS[1] = limiter key, ARGV = now_ms, window_ms, limit. Returns the request
+# count for the window, including the current request when it was admitted.
+RATE_LIMIT_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+local count = redis.call('ZCARD', key)
+if count >= limit then
+    return count + 1
+end
+redis.call('ZADD', key, now, now .. '-' .. count)
+redis.call('PEXPIRE', key, window)
+return count + 1
+"""
+
+# Geo check for one verification. Reports a blacklisted IP without touching
+# its cluster; otherwise adds the IP to the cell's set, bumps the cell's
+# counter and refreshes both TTLs, atomically. KEYS = IP blacklist key, ips
+# set, counter; ARGV = ip, expire_s. Returns -1 for a blacklisted IP, else the
+# cluster's new count.
+GEO_FRAUD_CHECK_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return -1
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+local count = redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return count
+"""
+
+# Token bucket. Refills the bucket for the time elapsed since its last use,
+# takes one token if available and saves it with a fresh TTL, atomically.
+# KEYS[1] = bucket hash; ARGV = now_s, rate (tokens/s), capacity, expire_s.
+# Returns 1 if a token was taken, else 0.
+TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local state = redis.call('HMGET', key, 't', 'ts')
+local tokens = tonumber(state[1])
+local last = tonumber(state[2])
+if tokens == nil or last == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+end
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', key, 't', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', key, ARGV[4])
+return allowed
+"""
+
+# EVALSHA digests of the scripts above, keyed by script source
+_script_shas: Dict[str, str] = {}
+
+# Geo clusters bucket locations into 0.5 degree grid cells
+GEO_GRID_SIZE = 0.5
+
+# Pub/sub channel announcing newly blacklisted token digests to every worker
+BLACKLIST_CHANNEL = "blacklist_add"
+
+# Blacklisted tokens are stored as bl:<digest> rather than the full JWT
+BLACKLIST_PREFIX = "bl:"
+LEGACY_BLACKLIST_PATTERN = "blacklist:*"
+
+# Process-local hits for blacklist EXISTS checks, keyed by Redis key. Entries
+# never leave a blacklist early, so hits are kept for 30 s; misses are not
+# cached, so a new ban is seen at once.
+_blacklist_hits: TTLCache = TTLCache(maxsize=100_000, ttl=30)
+
+# Set of disabled user ids, and the channel announcing additions to it
+REVOKED_USERS_KEY = "revoked_users"
+USER_REVOKED_CHANNEL = "user_revoked"
+
 
 async def connect_redis() -> None:
     """Connect to Redis."""
-    global _redis
-    settings = get_settings()
-
+    global _pool, _redis
     try:
-        _redis = await redis.from_url(
+        _pool = ConnectionPool.from_url(
             settings.REDIS_URL,
             encoding="utf8",
             decode_responses=True,
             socket_connect_timeout=5,
+            socket_keepalive=True,
+            max_connections=settings.REDIS_MAX_POOL,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
         )
+        _redis = Redis(connection_pool=_pool)
 
         # Test connection
         await _redis.ping()
         logger.info("Connected to Redis successfully")
+
+        # Load Lua scripts once so requests only pay for EVALSHA
+        for script in (RATE_LIMIT_LUA, TOKEN_BUCKET_LUA, GEO_FRAUD_CHECK_LUA):
+            _script_shas[script] = await _redis.script_load(script)
     except Exception as e:
-        logger.error(f"Failed to connect to Redis: {str(e)}")
+        logger.error("Failed to connect to Redis: %s", e)
         raise
 
 
 async def disconnect_redis() -> None:
     """Disconnect from Redis."""
-    global _redis
+    global _pool, _redis
     if _redis:
         await _redis.close()
+        _redis = None
+    if _pool:
+        # A client built on an explicit pool does not close it on its own
+        await _pool.disconnect()
+        _pool = None
         logger.info("Disconnected from Redis")
 
 
 def get_redis() -> Redis:
-    """Get the Redis client."""
+    """
+    Get the Redis client.
+
+    The helpers below read the ``_redis`` global directly (``_redis or
+    get_redis()``) and only fall through to this call, and its error, when
+    Redis is not connected.
+    """
     if _redis is None:
         raise RuntimeError("Redis not initialized. Call connect_redis() first.")
     return _redis
 
 
+async def _run_script(script: str, keys: Sequence[str], args: Sequence[Any]) -> Any:
+    """Run a Lua script by EVALSHA, loading it if this process has no digest yet."""
+    redis_client = _redis or get_redis()
+    try:
+        sha = _script_shas.get(script)
+        if sha is None:
+            sha = _script_shas[script] = await redis_client.script_load(script)
+        return await redis_client.evalsha(sha, len(keys), *keys, *args)
+    except NoScriptError:
+        # Script cache was flushed (e.g. Redis restart); EVAL reloads it
+        _script_shas.pop(script, None)
+        return await redis_client.eval(script, len(keys), *keys, *args)
+
+
 async def set_cache(key: str, value: Any, expire: int = 3600) -> None:
     """Set a value in cache with optional expiry."""
-    redis_client = get_redis()
+    redis_client = _redis or get_redis()
     try:
         if isinstance(value, (dict, list)):
-            value = json.dumps(value)
-        await redis_client.setex(key, expire, str(value))
+            value = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        elif isinstance(value, bool) or not isinstance(value, (str, bytes, int, float)):
+            value = str(value)
+        await redis_client.setex(key, expire, value)
     except Exception as e:
-        logger.error(f"Error setting cache key {key}: {str(e)}")
+        logger.error("Error setting cache key %s: %s", key, e)
 
 
 async def get_cache(key: str) -> Optional[Any]:
     """Get a value from cache."""
-    redis_client = get_redis()
+    redis_client = _redis or get_redis()
     try:
         value = await redis_client.get(key)
         if value:
             try:
-                return json.loads(value)
-            except (json.JSONDecodeError, ValueError):
+                return orjson.loads(value)
+            except orjson.JSONDecodeError:
                 return value
         return None
     except Exception as e:
-        logger.error(f"Error getting cache key {key}: {str(e)}")
+        logger.error("Error getting cache key %s: %s", key, e)
         return None
 
 
 async def delete_cache(key: str) -> None:
     """Delete a cache key."""
-    redis_client = get_redis()
+    redis_client = _redis or get_redis()
     try:
         await redis_client.delete(key)
     except Exception as e:
-        logger.error(f"Error deleting cache key {key}: {str(e)}")
+        logger.error("Error deleting cache key %s: %s", key, e)
+
+
+async def _scan_batches(redis_client: Redis, pattern: str, count: int = 500) -> AsyncIterator[List[str]]:
+    """Yield keys matching ``pattern`` in batches of up to ``count``, via SCAN."""
+    batch: List[str] = []
+    async for key in redis_client.scan_iter(match=pattern, count=count):
+        batch.append(key)
+        if len(batch) >= count:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 async def clear_cache_pattern(pattern: str) -> None:
     """Clear all keys matching a pattern."""
-    redis_client = get_redis()
+    redis_client = _redis or get_redis()
     try:
-        keys = await redis_client.keys(pattern)
-        if keys:
-            await redis_client.delete(*keys)
+        # SCAN instead of KEYS so Redis is never blocked walking the keyspace;
+        # UNLINK frees the values off the main thread
+        async for batch in _scan_batches(redis_client, pattern):
+            await redis_client.unlink(*batch)
     except Exception as e:
-        logger.error(f"Error clearing cache pattern {pattern}: {str(e)}")
+        logger.error("Error clearing cache pattern %s: %s", pattern, e)
+
+
+# Fields kept in the per-user auth cache
+USER_CACHE_FIELDS = ("role", "is_active", "email")
+
+
+async def get_cached_user(user_id: str) -> Optional[dict]:
+    """Get a cached user summary."""
+    try:
+        redis_client = _redis or get_redis()
+        value = await redis_client.get(f"user:{user_id}")
+        return orjson.loads(value) if value else None
+    except Exception as e:
+        logger.error("Error getting cached user %s: %s", user_id, e)
+        return None
+
+
+async def cache_user(user_id: str, user: dict, expire: int = 30) -> None:
+    """Cache the auth-relevant fields of a user document."""
+    summary = {"_id": user_id, **{field: user.get(field) for field in USER_CACHE_FIELDS}}
+    try:
+        redis_client = _redis or get_redis()
+        await redis_client.set(f"user:{user_id}", orjson.dumps(summary), ex=expire)
+    except Exception as e:
+        logger.error("Error caching user %s: %s", user_id, e)
+
+
+async def invalidate_user_cache(user_id: str) -> None:
+    """Drop a user's cached summary after it changes."""
+    try:
+        redis_client = _redis or get_redis()
+        await redis_client.delete(f"user:{user_id}")
+    except Exception as e:
+        logger.error("Error invalidating user cache %s: %s", user_id, e)
+
+
+def token_digest(token: str) -> str:
+    """Short, fixed-size identifier for a token (128-bit blake2b, hex)."""
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
 
 
 async def add_token_to_blacklist(token: str, expire_in_seconds: int) -> None:
-    """Add a token to the blacklist."""
-    redis_client = get_redis()
+    """Add a token to the blacklist and announce it to other workers."""
+    redis_client = _redis or get_redis()
+    digest = token_digest(token)
     try:
-        await redis_client.setex(f"blacklist:{token}", expire_in_seconds, "1")
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.setex(f"{BLACKLIST_PREFIX}{digest}", expire_in_seconds, "1")
+            pipe.publish(BLACKLIST_CHANNEL, digest)
+            await pipe.execute()
     except Exception as e:
-        logger.error(f"Error adding token to blacklist: {str(e)}")
+        logger.error("Error adding token to blacklist: %s", e)
+
+
+async def _cached_exists(redis_client: Redis, key: str) -> bool:
+    """EXISTS through the local blacklist hit cache."""
+    if key in _blacklist_hits:
+        return True
+    found = await redis_client.exists(key) == 1
+    if found:
+        _blacklist_hits[key] = True
+    return found
 
 
 async def is_token_blacklisted(token: str) -> bool:
     """Check if a token is blacklisted."""
-    redis_client = get_redis()
+    redis_client = _redis or get_redis()
     try:
-        return await redis_client.exists(f"blacklist:{token}") == 1
+        # Misses are not cached: the local Bloom filter already answers those,
+        # and a just-revoked token must be seen at once
+        return await _cached_exists(redis_client, f"{BLACKLIST_PREFIX}{token_digest(token)}")
     except Exception as e:
-        logger.error(f"Error checking token blacklist: {str(e)}")
+        logger.error("Error checking token blacklist: %s", e)
         return False
 
 
-async def increment_request_count(ip_address: str, expire: int = 3600) -> int:
-    """Increment request count for rate limiting."""
-    redis_client = get_redis()
+async def revoke_user(user_id: str) -> None:
+    """Mark a user as revoked and announce it to other workers."""
+    redis_client = _redis or get_redis()
     try:
-        key = f"rate_limit:{ip_address}"
-        count = await redis_client.incr(key)
-        if count == 1:
-            await redis_client.expire(key, expire)
-        return count
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.sadd(REVOKED_USERS_KEY, user_id)
+            pipe.publish(USER_REVOKED_CHANNEL, user_id)
+            await pipe.execute()
     except Exception as e:
-        logger.error(f"Error incrementing request count: {str(e)}")
-        return 0
+        logger.error("Error revoking user %s: %s", user_id, e)
 
 
-async def add_geo_fraud_cluster(lat: float, lon: float, ip: str, expire: int = 86400) -> None:
-    """Add IP to geo-fraud cluster."""
-    redis_client = get_redis()
+async def restore_user(user_id: str) -> None:
+    """Remove a user from the revoked set."""
+    redis_client = _redis or get_redis()
     try:
-        grid_size = 0.5  # 0.5 degree grid cells
-        grid_lat = int(lat / grid_size)
-        grid_lon = int(lon / grid_size)
-        key = f"geo_clusters:{grid_lat}:{grid_lon}"
-
-        # Add to set and update metadata
-        await redis_client.sadd(f"{key}:ips", ip)
-        await redis_client.incr(f"{key}:count")
-        await redis_client.expire(f"{key}:ips", expire)
-        await redis_client.expire(f"{key}:count", expire)
+        await redis_client.srem(REVOKED_USERS_KEY, user_id)
     except Exception as e:
-        logger.error(f"Error adding to geo cluster: {str(e)}")
+        logger.error("Error restoring user %s: %s", user_id, e)
 
 
-async def get_geo_cluster_count(lat: float, lon: float) -> int:
-    """Get count of IPs in a geo cluster."""
-    redis_client = get_redis()
+async def is_user_revoked(user_id: str) -> bool:
+    """Check if a user has been revoked."""
+    redis_client = _redis or get_redis()
     try:
-        grid_size = 0.5
-        grid_lat = int(lat / grid_size)
-        grid_lon = int(lon / grid_size)
-        key = f"geo_clusters:{grid_lat}:{grid_lon}"
+        return bool(await redis_client.sismember(REVOKED_USERS_KEY, user_id))
+    except Exception as e:
+        logger.error("Error checking revoked users: %s", e)
+        return False
+
 
-        count = await redis_client.get(f"{key}:count")
-        return int(count) if count else 0
+async def migrate_legacy_blacklist() -> int:
+    """Rewrite old blacklist:<token> keys as bl:<digest>, keeping their TTL."""
+    redis_client = _redis or get_redis()
+    migrated = 0
+    async for key in redis_client.scan_iter(match=LEGACY_BLACKLIST_PATTERN, count=1000):
+        ttl = await redis_client.ttl(key)
+        if ttl == -2:
+            continue
+        token = key.split(":", 1)[1]
+        async with redis_client.pipeline(transaction=False) as pipe:
+            if ttl > 0:
+                pipe.setex(f"{BLACKLIST_PREFIX}{token_digest(token)}", ttl, "1")
+            else:
+                pipe.set(f"{BLACKLIST_PREFIX}{token_digest(token)}", "1")
+            pipe.unlink(key)
+            await pipe.execute()
+        migrated += 1
+    return migrated
+
+
+async def auth_preflight(token: str, user_id: str) -> Tuple[bool, bool]:
+    """Check token blacklist and revoked users in one round-trip."""
+    redis_client = _redis or get_redis()
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.exists(f"{BLACKLIST_PREFIX}{token_digest(token)}")
+            pipe.sismember(REVOKED_USERS_KEY, user_id)
+            token_revoked, user_revoked = await pipe.execute()
+        return token_revoked == 1, bool(user_revoked)
     except Exception as e:
-        logger.error(f"Error getting geo cluster count: {str(e)}")
-        return 0
+        logger.error("Error running auth preflight: %s", e)
+        return False, False
+
 
+async def check_rate_limit(client_ip: str, limit: int, window_ms: int = 3_600_000) -> int:
+    """
+    Record a request in the rolling rate-limit window and return the window count.
 
-async def is_ip_blacklisted(ip: str) -> bool:
-    """Check if an IP is blacklisted for fraud."""
-    redis_client = get_redis()
+    Redis errors propagate; the middleware decides whether to fail open.
+    """
+    now_ms = int(time.time() * 1000)
+    return await _run_script(RATE_LIMIT_LUA, (f"rl:{client_ip}",), (now_ms, window_ms, limit))
+
+
+async def token_bucket_consume(
+    client_ip: str,
+    rate: float,
+    capacity: int,
+    expire: int = 7200,
+) -> bool:
+    """
+    Take one token from the client's bucket, refilling at ``rate`` tokens/s.
+
+    Refill and consume run as one script, so concurrent requests from an IP
+    cannot spend the same token. Idle buckets expire after ``expire`` s.
+    Redis errors propagate, as in check_rate_limit.
+    """
+    allowed = await _run_script(
+        TOKEN_BUCKET_LUA, (f"tb:{client_ip}",), (time.time(), rate, capacity, expire)
+    )
+    return allowed == 1
+
+
+def geo_cluster_key(lat: float, lon: float) -> str:
+    """Key prefix of the grid cell containing a location."""
+    return f"geo_clusters:{int(lat / GEO_GRID_SIZE)}:{int(lon / GEO_GRID_SIZE)}"
+
+
+async def geo_fraud_check(lat: float, lon: float, ip: str, expire: int = 86400) -> Tuple[bool, int]:
+    """
+    Check the IP blacklist and update the geo cluster in one round-trip.
+
+    Returns ``(ip_blacklisted, cluster_count)``. Blacklisted IPs are not
+    added to the cluster and report a count of 0.
+    """
+    blacklist_key = f"fraud_ip_blacklist:{ip}"
+    if blacklist_key in _blacklist_hits:
+        return True, 0
+
+    key = geo_cluster_key(lat, lon)
+    keys = (blacklist_key, f"{key}:ips", f"{key}:count")
     try:
-        return await redis_client.exists(f"fraud_ip_blacklist:{ip}") == 1
+        count = await _run_script(GEO_FRAUD_CHECK_LUA, keys, (ip, expire))
     except Exception as e:
-        logger.error(f"Error checking IP blacklist: {str(e)}")
-        return False
+        logger.error("Error running geo fraud check: %s", e)
+        return False, 0
+
+    if count < 0:
+        _blacklist_hits[blacklist_key] = True
+        return True, 0
+    return False, count
 
 
 async def add_ip_to_blacklist(ip: str, expire: int = 604800) -> None:
     """Add IP to fraud blacklist (7 days default)."""
-    redis_client = get_redis()
+    redis_client = _redis or get_redis()
     try:
-        await redis_client.setex(f"fraud_ip_blacklist:{ip}", expire, "1")
+        key = f"fraud_ip_blacklist:{ip}"
+        await redis_client.setex(key, expire, "1")
+        _blacklist_hits[key] = True
     except Exception as e:
-        logger.error(f"Error adding IP to blacklist: {str(e)}")
+        logger.error("Error adding IP to blacklist: %s", e)
@@ -0,0 +1,15 @@
+"""Per-request context shared with every logger on the request path."""
+from contextvars import ContextVar
+import logging
+
+# Short id of the request being handled; "-" outside of a request
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (for ``%(request_id)s``)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
@@ -1,38 +1,147 @@
 """Security utilities for JWT and password handling."""
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 from typing import Optional, Dict, Any
+from cachetools import TLRUCache
+import asyncio
+import base64
+import hashlib
+import hmac
 import jwt
-from passlib.context import CryptContext
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
 import logging
-from app.core.config import get_settings
-import re
+from app.core.config import settings
+import string
+import time
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto",
-    argon2__time_cost=2,
-    argon2__memory_cost=65536,
-    argon2__parallelism=2,
+# Verified token claims keyed by a 128-bit token digest. Each entry lives for
+# at most 60 s and never past the token's own ``exp`` (wall-clock timer).
+_TOKEN_CACHE_TTL = 60
+
+
+def _token_ttu(key: bytes, payload: Dict[str, Any], now: float) -> float:
+    return min(now + _TOKEN_CACHE_TTL, payload["exp"])
+
+
+_TOKEN_CACHE: TLRUCache = TLRUCache(maxsize=10_000, ttu=_token_ttu, timer=time.time)
+
+# Decoder, key and algorithm list prepared once instead of on every decode
+_jwt = jwt.PyJWT(options={"require": ["exp"]})
+_JWT_KEY = settings.JWT_SECRET.encode()
+_JWT_ALGORITHMS = (settings.JWT_ALGORITHM,)
+
+# Default token lifetimes in seconds; iat/exp are written as integer epochs
+_ACCESS_TOKEN_TTL = settings.JWT_ACCESS_EXPIRE_MINUTES * 60
+_REFRESH_TOKEN_TTL = settings.JWT_REFRESH_EXPIRE_DAYS * 24 * 60 * 60
+
+# Header segment of the tokens this service issues with HS256; tokens carrying
+# exactly this header are verified with a one-shot OpenSSL HMAC
+_HS256_HEADER = jwt.encode({}, "", algorithm="HS256").split(".", 1)[0]
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+# Registered claims the fast HS256 path leaves to PyJWT. PyJWT rejects any
+# ``aud`` when no audience is configured and checks ``iss`` when one is.
+_PYJWT_ONLY_CLAIMS = frozenset({"aud", "iss"})
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _decode_hs256(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify an HS256 token issued by this service.
+
+    Equivalent to ``_jwt.decode`` for the claims this service issues: exp
+    required, iat and nbf honoured, as integer epochs. Returns None for a
+    token outside that shape (audience or issuer claims, non-integer
+    times) so the caller hands it to PyJWT instead. Raises the same PyJWT
+    exceptions.
+    """
+    signing_input, _, signature = token.rpartition(".")
+    try:
+        expected = _b64url_decode(signature)
+        payload = orjson.loads(_b64url_decode(signing_input.partition(".")[2]))
+    except (ValueError, orjson.JSONDecodeError):
+        raise jwt.DecodeError("Invalid token encoding")
+
+    if not hmac.compare_digest(hmac.digest(_JWT_KEY, signing_input.encode(), "sha256"), expected):
+        raise jwt.InvalidSignatureError("Signature verification failed")
+    if not isinstance(payload, dict):
+        raise jwt.DecodeError("Invalid payload")
+
+    exp = payload.get("exp")
+    if exp is None:
+        raise jwt.MissingRequiredClaimError("exp")
+    iat = payload.get("iat")
+    nbf = payload.get("nbf")
+    if (
+        not _PYJWT_ONLY_CLAIMS.isdisjoint(payload)
+        or not _is_int(exp)
+        or (iat is not None and not _is_int(iat))
+        or (nbf is not None and not _is_int(nbf))
+    ):
+        return None
+
+    now = time.time()
+    if exp <= now:
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    if iat is not None and iat > now:
+        raise jwt.ImmatureSignatureError("The token is not yet valid (iat)")
+    if nbf is not None and nbf > now:
+        raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+    return payload
+
+
+# Argon2id hasher; hashes are standard PHC strings, so ones written by the
+# former passlib context still verify
+_password_hasher = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
 )
 
 
 def hash_password(password: str) -> str:
     """Hash a password using Argon2id."""
-    return pwd_context.hash(password)
+    return _password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        return _password_hasher.verify(hashed_password, plain_password)
+    except VerifyMismatchError:
+        return False
     except Exception as e:
-        logger.error(f"Error verifying password: {str(e)}")
+        logger.error("Error verifying password: %s", e)
         return False
 
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on a worker thread, keeping the event loop free."""
+    return await asyncio.to_thread(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on a worker thread, keeping the event loop free."""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+
+# Character classes required by validate_password_strength
+_UPPER = frozenset(string.ascii_uppercase)
+_LOWER = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+_SPECIAL = frozenset('!@#$%^&*(),.?":{}|<>')
+
+
 def validate_password_strength(password: str) -> tuple[bool, str]:
     """
     Validate password strength.
@@ -43,21 +152,23 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
     - At least 1 digit
     - At least 1 special character
     """
-    settings = get_settings()
-
     if len(password) < settings.PASSWORD_MIN_LENGTH:
         return False, f"Password must be at least {settings.PASSWORD_MIN_LENGTH} characters"
 
-    if not re.search(r"[A-Z]", password):
+    # One pass over the password; the class checks then only touch its
+    # distinct characters
+    chars = frozenset(password)
+
+    if chars.isdisjoint(_UPPER):
         return False, "Password must contain at least one uppercase letter"
 
-    if not re.search(r"[a-z]", password):
+    if chars.isdisjoint(_LOWER):
         return False, "Password must contain at least one lowercase letter"
 
-    if not re.search(r"\d", password):
+    if chars.isdisjoint(_DIGITS):
         return False, "Password must contain at least one digit"
 
-    if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
+    if chars.isdisjoint(_SPECIAL):
         return False, "Password must contain at least one special character"
 
     return True, "Password is valid"
@@ -68,17 +179,11 @@ def create_access_token(
     expires_delta: Optional[timedelta] = None
 ) -> str:
     """Create a JWT access token."""
-    settings = get_settings()
     to_encode = data.copy()
+    now = int(time.time())
+    ttl = int(expires_delta.total_seconds()) if expires_delta else _ACCESS_TOKEN_TTL
 
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            minutes=settings.JWT_ACCESS_EXPIRE_MINUTES
-        )
-
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"iat": now, "exp": now + ttl, "type": "access"})
     encoded_jwt = jwt.encode(
         to_encode,
         settings.JWT_SECRET,
@@ -92,17 +197,11 @@ def create_refresh_token(
     expires_delta: Optional[timedelta] = None
 ) -> str:
     """Create a JWT refresh token."""
-    settings = get_settings()
     to_encode = data.copy()
+    now = int(time.time())
+    ttl = int(expires_delta.total_seconds()) if expires_delta else _REFRESH_TOKEN_TTL
 
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            days=settings.JWT_REFRESH_EXPIRE_DAYS
-        )
-
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"iat": now, "exp": now + ttl, "type": "refresh"})
     encoded_jwt = jwt.encode(
         to_encode,
         settings.JWT_SECRET,
@@ -113,22 +212,38 @@ def create_refresh_token(
 
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
     """Decode and verify a JWT token."""
-    settings = get_settings()
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    hit = _TOKEN_CACHE.get(key)
+    if hit is not None:
+        # Callers get their own copy; the cached claims are shared
+        return dict(hit)
+
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        return payload
+        payload = None
+        if _JWT_ALGORITHMS == ("HS256",) and token.startswith(_HS256_HEADER + "."):
+            payload = _decode_hs256(token)
+        if payload is None:
+            payload = _jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS)
+        _TOKEN_CACHE[key] = payload
+        return dict(payload)
     except jwt.ExpiredSignatureError:
         logger.warning("Token has expired")
         return None
     except jwt.InvalidTokenError as e:
-        logger.warning(f"Invalid token: {str(e)}")
+        logger.warning("Invalid token: %s", e)
         return None
 
 
+def evict_decoded_token(digest: str) -> None:
+    """
+    Drop a revoked token's cached claims.
+
+    ``digest`` is the token's hex blake2b-16 digest, as used for the
+    blacklist keys; it is the hex form of this cache's key.
+    """
+    _TOKEN_CACHE.pop(bytes.fromhex(digest), None)
+
+
 def get_token_from_header(authorization_header: str) -> Optional[str]:
     """Extract JWT token from Authorization header."""
     if not authorization_header:
@@ -144,10 +259,9 @@ def get_token_from_header(authorization_header: str) -> Optional[str]:
 def create_qr_token(data: Dict[str, Any], expires_minutes: int = 1440) -> str:
     """Create a QR code token for certificate verification."""
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
-    to_encode.update({"exp": expire, "type": "qr"})
+    now = int(time.time())
+    to_encode.update({"iat": now, "exp": now + expires_minutes * 60, "type": "qr"})
 
-    settings = get_settings()
     encoded_jwt = jwt.encode(
         to_encode,
         settings.JWT_SECRET,
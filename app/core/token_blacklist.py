@@ -0,0 +1,242 @@
+"""Process-local filters in front of the Redis token blacklist and revoked users."""
+from app.core.redis_client import (
+    auth_preflight,
+    get_redis,
+    is_token_blacklisted,
+    is_user_revoked,
+    migrate_legacy_blacklist,
+    token_digest,
+    BLACKLIST_CHANNEL,
+    BLACKLIST_PREFIX,
+    REVOKED_USERS_KEY,
+    USER_REVOKED_CHANNEL,
+)
+from app.core.config import settings
+from app.core.security import evict_decoded_token
+from typing import Iterable, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Bounds, in seconds, of the wait before resubscribing after a Redis error
+RESUBSCRIBE_MIN_DELAY = 1.0
+RESUBSCRIBE_MAX_DELAY = 30.0
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a blake2b digest."""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """Size the bit array and hash count for the expected capacity."""
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        """Bit positions for an item."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> None:
+        """Add an item to the filter."""
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        """Return False if the item was definitely never added."""
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenBlacklist:
+    """
+    Local membership filters for revoked tokens and revoked users.
+
+    Both are seeded from Redis on startup and kept current through the
+    ``blacklist_add`` and ``user_revoked`` pub/sub channels, so every worker
+    sees revocations made by the others. A negative local answer is
+    authoritative (Bloom filters have no false negatives); a positive answer
+    is confirmed against Redis, which also covers users restored since.
+    Until the subscription is live, every check goes to Redis.
+
+    The filters are rebuilt from Redis every ``refresh_interval`` seconds,
+    so expired revocations drop out instead of raising the false-positive
+    rate for the life of the process.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+        refresh_interval: float = 900.0,
+    ):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._refresh_interval = refresh_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        self._revoked_users: Set[str] = set()
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Revocations received while a rebuild is scanning Redis, replayed
+        # into the new filters before they replace the current ones
+        self._pending_digests: Optional[List[str]] = None
+        self._pending_users: Optional[List[str]] = None
+        self._rebuild_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """Subscribe to revocations and seed the filter from Redis."""
+        if self._task is None:
+            pubsub = await self._subscribe()
+            self._task = asyncio.create_task(self._listen(pubsub))
+            self._refresh_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        """Stop listening for revocations."""
+        self._ready = False
+        for task in (self._task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._refresh_task = None
+
+    async def check(self, token: str, user_id: str) -> Tuple[bool, bool]:
+        """Return (token revoked, user revoked), asking Redis only if needed."""
+        if (
+            self._ready
+            and token_digest(token) not in self._filter
+            and user_id not in self._revoked_users
+        ):
+            return False, False
+        return await auth_preflight(token, user_id)
+
+    async def is_blacklisted(self, token: str) -> bool:
+        """Check whether a token has been revoked."""
+        if self._ready and token_digest(token) not in self._filter:
+            return False
+        return await is_token_blacklisted(token)
+
+    async def is_user_revoked(self, user_id: str) -> bool:
+        """Check whether a user has been disabled."""
+        if self._ready and user_id not in self._revoked_users:
+            return False
+        return await is_user_revoked(user_id)
+
+    def add_local(self, token: str) -> None:
+        """Record a revocation in this process's filter and decode cache."""
+        self._add_digest(token_digest(token))
+
+    def _add_digest(self, digest: str) -> None:
+        self._filter.add(digest)
+        if self._pending_digests is not None:
+            self._pending_digests.append(digest)
+        evict_decoded_token(digest)
+
+    def _add_user(self, user_id: str) -> None:
+        self._revoked_users.add(user_id)
+        if self._pending_users is not None:
+            self._pending_users.append(user_id)
+
+    async def _subscribe(self):
+        """Subscribe first, then seed, so no revocation falls between the two."""
+        pubsub = get_redis().pubsub()
+        try:
+            await pubsub.subscribe(BLACKLIST_CHANNEL, USER_REVOKED_CHANNEL)
+
+            migrated = await migrate_legacy_blacklist()
+            if migrated:
+                logger.info("Migrated %d legacy blacklist keys", migrated)
+
+            await self._rebuild()
+        except BaseException:
+            await pubsub.close()
+            raise
+
+        self._ready = True
+        return pubsub
+
+    async def _rebuild(self) -> None:
+        """Rebuild both filters from Redis, then swap them in."""
+        redis_client = get_redis()
+        async with self._rebuild_lock:
+            self._pending_digests, self._pending_users = [], []
+            try:
+                bloom = BloomFilter(self._capacity, self._error_rate)
+                async for key in redis_client.scan_iter(match=f"{BLACKLIST_PREFIX}*", count=1000):
+                    bloom.add(key[len(BLACKLIST_PREFIX):])
+                revoked_users = set(await redis_client.smembers(REVOKED_USERS_KEY))
+
+                for digest in self._pending_digests:
+                    bloom.add(digest)
+                revoked_users.update(self._pending_users)
+                self._filter, self._revoked_users = bloom, revoked_users
+            finally:
+                self._pending_digests = self._pending_users = None
+        logger.debug("Token blacklist filter seeded from Redis")
+
+    async def _refresh_periodically(self) -> None:
+        """Rebuild the filters on a schedule while the subscription is live."""
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            if not self._ready:
+                # The listener rebuilds them when it resubscribes
+                continue
+            try:
+                await self._rebuild()
+            except Exception as e:
+                logger.error("Token blacklist refresh failed: %s", e)
+
+    async def _listen(self, pubsub) -> None:
+        """
+        Apply revocations published by any worker.
+
+        If the subscription drops, resubscribe with a capped exponential
+        backoff; listening resumes only once a new subscription is live.
+        """
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    if message["channel"] == USER_REVOKED_CHANNEL:
+                        self._add_user(message["data"])
+                    else:
+                        self._add_digest(message["data"])
+                logger.warning("Token blacklist subscription ended")
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                logger.error("Token blacklist subscription error: %s", e)
+
+            self._ready = False
+            try:
+                await pubsub.close()
+            except Exception as e:
+                logger.debug("Error closing token blacklist subscription: %s", e)
+            pubsub = await self._resubscribe()
+
+    async def _resubscribe(self):
+        """Retry _subscribe with backoff until it succeeds."""
+        delay = RESUBSCRIBE_MIN_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                return await self._subscribe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY)
+                logger.error("Token blacklist resubscribe failed: %s", e)
+
+
+# Shared blacklist filter for this process
+token_blacklist = TokenBlacklist(refresh_interval=settings.TOKEN_BLACKLIST_REFRESH_SECONDS)
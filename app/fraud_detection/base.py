@@ -1,8 +1,73 @@
 """Base class for fraud detection layers."""
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Union
 from PIL import Image
+import asyncio
+import hashlib
 import io
+import numpy as np
+
+# Images at least this large are hashed on a worker thread (hashlib releases
+# the GIL), so a big upload does not stall the event loop
+HASH_OFFLOAD_BYTES = 1 << 20
+
+
+async def sha256_hex(data: bytes) -> str:
+    """SHA-256 hex digest of ``data``, off the event loop for large inputs."""
+    if len(data) < HASH_OFFLOAD_BYTES:
+        return hashlib.sha256(data).hexdigest()
+    return await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+
+
+class LayerContext:
+    """
+    Inputs shared by every layer for one verification.
+
+    The image is opened on first access and the same object is reused by
+    all layers, so a certificate is parsed once per pipeline run.
+    """
+
+    # One context is built per verification; slots keep it dict-free (the
+    # lazy attributes are cached by hand since cached_property needs __dict__)
+    __slots__ = ("image_data", "metadata", "_image", "_pixels", "_sha256")
+
+    def __init__(self, image_data: bytes, metadata: Optional[Dict[str, Any]] = None):
+        self.image_data = image_data
+        self.metadata = metadata if metadata is not None else {}
+        self._image: Optional[Image.Image] = None
+        self._pixels: Optional[np.ndarray] = None
+        self._sha256: Optional[str] = None
+
+    async def sha256(self) -> str:
+        """SHA-256 hex digest of the image bytes, computed once per context."""
+        if self._sha256 is None:
+            self._sha256 = await sha256_hex(self.image_data)
+        return self._sha256
+
+    @property
+    def image(self) -> Image.Image:
+        """The certificate image (pixels are decoded lazily by PIL)."""
+        if self._image is None:
+            self._image = Image.open(io.BytesIO(self.image_data))
+        return self._image
+
+    @property
+    def pixels(self) -> np.ndarray:
+        """
+        The image as one contiguous, read-only uint8 RGB array (H, W, 3).
+
+        Decoded once; pixel-level layers share this array instead of each
+        converting the PIL image themselves.
+        """
+        if self._pixels is None:
+            pixels = np.ascontiguousarray(self.image.convert("RGB"), dtype=np.uint8)
+            pixels.flags.writeable = False
+            self._pixels = pixels
+        return self._pixels
+
+
+# Layers accept raw bytes (standalone use) or a pipeline's shared context
+ImageInput = Union[bytes, LayerContext]
 
 
 class FraudDetectionLayer(ABC):
@@ -13,21 +78,28 @@ class FraudDetectionLayer(ABC):
         self.max_score = max_score
 
     @abstractmethod
-    async def analyze(self, image_data: bytes) -> Dict[str, Any]:
+    async def analyze(self, image_data: ImageInput) -> Dict[str, Any]:
         """
         Analyze image for fraud indicators.
 
         Args:
-            image_data: Raw image bytes
+            image_data: Raw image bytes or a shared LayerContext
 
         Returns:
             Dictionary with score and details
         """
         pass
 
-    def _load_image(self, image_data: bytes) -> Image.Image:
-        """Load image from bytes."""
-        return Image.open(io.BytesIO(image_data))
+    @staticmethod
+    def _context(image_data: ImageInput) -> LayerContext:
+        """Wrap raw bytes in a LayerContext; pass a context through unchanged."""
+        if isinstance(image_data, LayerContext):
+            return image_data
+        return LayerContext(image_data)
+
+    def _load_image(self, image_data: ImageInput) -> Image.Image:
+        """Load image from bytes, or reuse the context's decoded image."""
+        return self._context(image_data).image
 
     def _get_base_score(self) -> float:
         """Get baseline score for this layer."""
@@ -0,0 +1,85 @@
+"""Single-sweep statistics for Error Level Analysis."""
+from dataclasses import dataclass
+from typing import Tuple
+import cv2
+import numpy as np
+
+# JET colours for every gray-difference value, amplified x10 with uint8
+# wrap-around as the heatmap has always done
+_HEATMAP_LUT = cv2.applyColorMap(
+    (np.arange(256, dtype=np.uint8) * np.uint8(10)).reshape(256, 1),
+    cv2.COLORMAP_JET,
+).reshape(256, 3)
+
+# Output buffers for the most recent image shape. Each process analyses one
+# image at a time (synchronously), so consecutive same-sized images reuse
+# them instead of allocating fresh image-sized arrays on every call.
+_scratch_shape: Tuple[int, ...] = ()
+_scratch_rgb = np.empty((0, 0, 3), dtype=np.uint8)
+_scratch_gray = np.empty((0, 0), dtype=np.uint8)
+_scratch_heatmap = np.empty((0, 0, 3), dtype=np.uint8)
+
+
+def _ensure_scratch(shape: Tuple[int, ...]) -> None:
+    """(Re)allocate the scratch buffers for an (H, W, 3) image shape."""
+    global _scratch_shape, _scratch_rgb, _scratch_gray, _scratch_heatmap
+    if shape != _scratch_shape:
+        _scratch_rgb = np.empty(shape, dtype=np.uint8)
+        _scratch_gray = np.empty(shape[:2], dtype=np.uint8)
+        _scratch_heatmap = np.empty(shape, dtype=np.uint8)
+        _scratch_shape = shape
+
+
+@dataclass(slots=True)
+class ELAStats:
+    """Gray difference image, its value histogram and cumulative counts."""
+
+    gray_diff: np.ndarray
+    hist: np.ndarray
+    cdf: np.ndarray
+    mean: float
+    max: int
+
+    def percentile(self, q: float) -> float:
+        """``np.percentile(gray_diff, q)`` (linear), read off the histogram."""
+        position = (self.cdf[-1] - 1) * q / 100.0
+        lower = int(np.searchsorted(self.cdf, np.floor(position), side="right"))
+        upper = int(np.searchsorted(self.cdf, np.ceil(position), side="right"))
+        return lower + (upper - lower) * (position - np.floor(position))
+
+    def count_above(self, threshold: float) -> int:
+        """Number of pixels whose difference is strictly above ``threshold``."""
+        index = int(np.floor(threshold))
+        if index < 0:
+            return int(self.cdf[-1])
+        return int(self.cdf[-1] - self.cdf[min(index, 255)])
+
+    def heatmap(self) -> np.ndarray:
+        """
+        BGR JET heatmap of the difference, via one table lookup.
+
+        Written into a scratch buffer that the next ela_stats call reuses.
+        """
+        _ensure_scratch(self.gray_diff.shape + (3,))
+        return np.take(_HEATMAP_LUT, self.gray_diff, axis=0, out=_scratch_heatmap)
+
+
+def ela_stats(original: np.ndarray, compressed: np.ndarray) -> ELAStats:
+    """
+    Compute the ELA gray difference and its statistics.
+
+    The difference stays uint8 throughout (no float copies), and mean, max
+    and percentiles all come from one 256-bin histogram instead of separate
+    sweeps and a sort over the image. ``gray_diff`` lives in a scratch
+    buffer that is overwritten by the next call.
+    """
+    _ensure_scratch(original.shape)
+    cv2.absdiff(original, compressed, dst=_scratch_rgb)
+    gray_diff = cv2.cvtColor(_scratch_rgb, cv2.COLOR_RGB2GRAY, dst=_scratch_gray)
+    hist = np.bincount(gray_diff.ravel(), minlength=256)
+    cdf = np.cumsum(hist)
+    total = int(cdf[-1])
+    values = np.nonzero(hist)[0]
+    max_value = int(values[-1]) if values.size else 0
+    mean = float(np.dot(hist, np.arange(256)) / total) if total else 0.0
+    return ELAStats(gray_diff=gray_diff, hist=hist, cdf=cdf, mean=mean, max=max_value)
@@ -0,0 +1,69 @@
+"""Optional on-device certificate classifier used ahead of Gemini."""
+from typing import Dict, Optional, Tuple
+import logging
+import threading
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Output heads of the classifier, in order: one probability each
+LOCAL_VISION_HEADS = ("seal_authentic", "layout_professional", "detected_editing")
+
+# Input side used when the model declares dynamic spatial dimensions
+DEFAULT_INPUT_SIZE = 224
+
+# Loaded model per path; None records a model that could not be loaded, so
+# the failure is logged once rather than on every verification
+_models: Dict[str, Optional["LocalVisionModel"]] = {}
+_models_lock = threading.Lock()
+
+
+class LocalVisionModel:
+    """
+    ONNX image classifier scoring the Gemini layout/seal/editing questions.
+
+    The model takes one float32 NCHW RGB image scaled to [0, 1] and returns
+    a (1, 3) array of probabilities for LOCAL_VISION_HEADS. Inference runs
+    on the CPU execution provider and is safe to call from several threads.
+    """
+
+    def __init__(self, path: str):
+        # Optional dependency: only needed when LOCAL_VISION_MODEL_PATH is set
+        import onnxruntime
+
+        self._session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        model_input = self._session.get_inputs()[0]
+        self._input_name = model_input.name
+        height, width = model_input.shape[2:4]
+        self._size = (
+            width if isinstance(width, int) else DEFAULT_INPUT_SIZE,
+            height if isinstance(height, int) else DEFAULT_INPUT_SIZE,
+        )
+
+    def predict(self, pixels: np.ndarray) -> Tuple[Dict[str, float], float]:
+        """
+        Classify a uint8 RGB (H, W, 3) image.
+
+        Returns the per-head probabilities and the overall confidence: the
+        least certain head's max(p, 1 - p).
+        """
+        resized = cv2.resize(pixels, self._size, interpolation=cv2.INTER_AREA)
+        batch = (resized.transpose(2, 0, 1)[np.newaxis] / np.float32(255)).astype(np.float32)
+        output = self._session.run(None, {self._input_name: batch})[0]
+        probabilities = np.asarray(output, dtype=np.float64).reshape(-1)[:len(LOCAL_VISION_HEADS)]
+        confidence = float(np.min(np.maximum(probabilities, 1.0 - probabilities)))
+        return dict(zip(LOCAL_VISION_HEADS, probabilities.tolist())), confidence
+
+
+def get_local_model(path: str) -> Optional[LocalVisionModel]:
+    """The classifier at ``path``, loaded on first use; None if unavailable."""
+    with _models_lock:
+        if path not in _models:
+            try:
+                _models[path] = LocalVisionModel(path)
+                logger.info(f"Loaded local vision model from {path}")
+            except Exception as e:
+                logger.warning(f"Local vision model unavailable ({path}): {str(e)}")
+                _models[path] = None
+        return _models[path]
@@ -1,8 +1,7 @@
 """Layer 5: Blockchain Verification (0-10 points)."""
-from app.fraud_detection.base import FraudDetectionLayer
+from app.fraud_detection.base import FraudDetectionLayer, ImageInput
 from app.core.config import get_settings
-from typing import Dict, Any
-import hashlib
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 import asyncio
 
@@ -18,7 +17,7 @@ class BlockchainLayer(FraudDetectionLayer):
 
     async def analyze(
         self,
-        image_data: bytes,
+        image_data: ImageInput,
         certificate_id: str = None,
     ) -> Dict[str, Any]:
         """
@@ -27,7 +26,7 @@ class BlockchainLayer(FraudDetectionLayer):
         """
         try:
             # If no contract configured, return neutral score
-            if not self.settings.CONTRACT_ADDRESS or not self.settings.WEB3_PRIVATE_KEY:
+            if not self.settings.blockchain.CONTRACT_ADDRESS or not self.settings.blockchain.WEB3_PRIVATE_KEY:
                 return {
                     "score": 0.0,  # No verification possible
                     "blockchain_verified": False,
@@ -39,7 +38,7 @@ class BlockchainLayer(FraudDetectionLayer):
                 }
 
             # Calculate certificate hash
-            cert_hash = hashlib.sha256(image_data).hexdigest()
+            cert_hash = await self._context(image_data).sha256()
 
             if certificate_id:
                 # Check if certificate exists on blockchain
@@ -49,8 +48,7 @@ class BlockchainLayer(FraudDetectionLayer):
                 )
 
                 if is_stored:
-                    score = 10.0 if not is_revoked else -10.0
-                    score = max(-10.0, min(score, 10.0))  # Clamp to range
+                    score = -10.0 if is_revoked else 10.0
 
                     return {
                         "score": score,
@@ -60,7 +58,7 @@ class BlockchainLayer(FraudDetectionLayer):
                         "is_revoked_on_chain": is_revoked,
                         "details": {
                             "network": "Polygon Mumbai",
-                            "contract": self.settings.CONTRACT_ADDRESS,
+                            "contract": self.settings.blockchain.CONTRACT_ADDRESS,
                         },
                         "flags": ["Blockchain verified"] if not is_revoked else ["Certificate revoked on blockchain"],
                     }
@@ -74,7 +72,7 @@ class BlockchainLayer(FraudDetectionLayer):
                 "is_revoked_on_chain": False,
                 "details": {
                     "network": "Polygon Mumbai",
-                    "contract": self.settings.CONTRACT_ADDRESS,
+                    "contract": self.settings.blockchain.CONTRACT_ADDRESS,
                 },
                 "flags": ["Certificate not found on blockchain"],
             }
@@ -100,13 +98,30 @@ class BlockchainLayer(FraudDetectionLayer):
         Verify certificate on blockchain.
         Returns: (is_stored, is_revoked, transaction_hash)
         """
+        results = await self.verify_many([certificate_id])
+        return results[certificate_id]
+
+    async def verify_many(
+        self,
+        certificate_ids: List[str],
+    ) -> Dict[str, Tuple[bool, bool, Optional[str]]]:
+        """
+        Look up several certificates on chain in one round trip.
+
+        The isStored/isRevoked/txHash reads for every id are meant to go out
+        as a single JSON-RPC batch (or Multicall3 aggregate), so a bulk
+        verification costs one RPC latency rather than one per certificate.
+
+        Returns: {certificate_id: (is_stored, is_revoked, transaction_hash)}
+        """
+        not_found: Tuple[bool, bool, Optional[str]] = (False, False, None)
         try:
             # In production, this would use Web3.py to call the smart contract
             # For now, return neutral values
-            logger.info(f"Checking blockchain for certificate {certificate_id}")
-            # Simulate blockchain check
+            logger.info(f"Checking blockchain for {len(certificate_ids)} certificate(s)")
+            # Simulate one batched blockchain round trip
             await asyncio.sleep(0.1)
-            return False, False, None
+            return {certificate_id: not_found for certificate_id in certificate_ids}
         except Exception as e:
             logger.error(f"Error verifying on blockchain: {str(e)}")
-            return False, False, None
+            return {certificate_id: not_found for certificate_id in certificate_ids}
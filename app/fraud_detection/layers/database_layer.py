@@ -1,23 +1,46 @@
 """Layer 4: Database Cross-Verification (0-20 points)."""
-from app.fraud_detection.base import FraudDetectionLayer
-from motor.motor_asyncio import AsyncDatabase
-from difflib import SequenceMatcher
-from typing import Dict, Any
+from app.fraud_detection.base import FraudDetectionLayer, ImageInput
+from app.core.batch_queue import BatchQueue
+from pymongo.asynchronous.database import AsyncDatabase
+from rapidfuzz import fuzz, process, utils
+from functools import lru_cache
+from typing import Dict, Any, List
+import heapq
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Minimum similarity (0-100) for a holder or institution to count as a match
+MATCH_THRESHOLD = 85.0
+
+# Text-search candidates fetched per verification, and the fields they carry
+CANDIDATE_LIMIT = 50
+CANDIDATE_PROJECTION = {"holder_name": 1, "institution_id": 1, "is_revoked": 1}
+
+# Concurrent verifications queue their candidate lookups for this long (s)
+# and share one query
+CANDIDATE_BATCH_WINDOW = 0.005
+
+
+@lru_cache(maxsize=4096)
+def _normalize(text: str) -> str:
+    """Lower-case, strip punctuation and trim; repeated names are served from cache."""
+    return utils.default_process(text)
+
+
 class DatabaseLayer(FraudDetectionLayer):
     """Database cross-verification layer using fuzzy matching."""
 
     def __init__(self, db: AsyncDatabase = None):
         super().__init__(max_score=20.0)
         self.db = db
+        # One coalescing queue per certificates collection (by full name)
+        self._candidate_queues: Dict[str, BatchQueue] = {}
 
     async def analyze(
         self,
-        image_data: bytes,
+        image_data: ImageInput,
         extracted_details: Dict[str, Any] = None,
         db: AsyncDatabase = None
     ) -> Dict[str, Any]:
@@ -31,7 +54,7 @@ class DatabaseLayer(FraudDetectionLayer):
         if db is None:
             db = self.db
 
-        if not db:
+        if db is None:
             return self._get_error_response("No database connection")
 
         try:
@@ -88,48 +111,134 @@ class DatabaseLayer(FraudDetectionLayer):
         degree_type: str,
     ) -> list:
         """Perform fuzzy search for matching certificates."""
-        threshold = 0.85  # 85% similarity threshold
         matches = []
 
         try:
-            # Get all certificates
-            all_certs = await certificates_col.find({}).to_list(None)
+            if not holder_name or not institution_name:
+                return []
 
-            for cert in all_certs:
-                if cert.get("is_revoked"):
-                    continue
+            # Shortlist by the certificates text index instead of loading the
+            # whole collection; fuzzy ranking then runs on the candidates only
+            candidates = await self._candidate_queue(certificates_col).load(holder_name)
+            if not candidates:
+                return []
 
-                # Calculate similarity scores
-                holder_similarity = self._fuzzy_match(
-                    holder_name.lower(),
-                    cert.get("holder_name", "").lower()
-                )
-                institution_similarity = self._fuzzy_match(
-                    institution_name.lower(),
-                    cert.get("institution_id", "")
+            # Holder names first: length-pruned, then scored in one C call
+            # (pairs below the cutoff exit early and come back as 0)
+            holder_query = _normalize(holder_name)
+            candidates = [
+                cert for cert in candidates
+                if self._length_can_match(holder_query, self._field_text(cert, "holder_name"))
+            ]
+            if not candidates:
+                return []
+            holder_scores = process.cdist(
+                [holder_query],
+                [self._field_text(cert, "holder_name") for cert in candidates],
+                scorer=fuzz.ratio,
+                score_cutoff=MATCH_THRESHOLD,
+            )[0]
+
+            # Institutions are only scored for candidates whose holder passed
+            institution_query = _normalize(institution_name)
+            passed = [
+                (cert, holder) for cert, holder in zip(candidates, holder_scores)
+                if holder and self._length_can_match(
+                    institution_query, self._field_text(cert, "institution_id")
                 )
+            ]
+            if not passed:
+                return []
+            institution_scores = process.cdist(
+                [institution_query],
+                [self._field_text(cert, "institution_id") for cert, _ in passed],
+                scorer=fuzz.ratio,
+                score_cutoff=MATCH_THRESHOLD,
+            )[0]
 
-                # Accept if both holder and institution match above threshold
-                if holder_similarity >= threshold and institution_similarity >= threshold:
+            # Accept if both holder and institution match above threshold
+            for (cert, holder), institution in zip(passed, institution_scores):
+                if institution:
                     matches.append({
                         **cert,
-                        "similarity_holder": holder_similarity,
-                        "similarity_institution": institution_similarity,
+                        "similarity_holder": float(holder) / 100.0,
+                        "similarity_institution": float(institution) / 100.0,
                     })
 
-            # Sort by similarity
-            matches.sort(key=lambda x: x.get("similarity_holder", 0), reverse=True)
-            return matches[:5]  # Return top 5 matches
+            # Top 5 by similarity
+            return heapq.nlargest(5, matches, key=lambda x: x.get("similarity_holder", 0))
 
         except Exception as e:
             logger.error(f"Fuzzy search error: {str(e)}")
             return []
 
-    def _fuzzy_match(self, str1: str, str2: str) -> float:
-        """Calculate fuzzy match similarity (0-1)."""
-        if not str1 or not str2:
-            return 0.0
-        return SequenceMatcher(None, str1, str2).ratio()
+    def _candidate_queue(self, certificates_col) -> BatchQueue:
+        """The lookup queue for ``certificates_col``, created on first use."""
+        queue = self._candidate_queues.get(certificates_col.full_name)
+        if queue is None:
+            async def load_candidates(holder_names: List[str]) -> Dict[str, list]:
+                return await self._load_candidates(certificates_col, holder_names)
+
+            queue = BatchQueue(load_candidates, window=CANDIDATE_BATCH_WINDOW, default=[])
+            self._candidate_queues[certificates_col.full_name] = queue
+        return queue
+
+    async def _load_candidates(
+        self,
+        certificates_col,
+        holder_names: List[str],
+    ) -> Dict[str, list]:
+        """
+        Fetch text-search candidates for several holder names in one query.
+
+        ``$text`` matches any of the combined terms, so each document is
+        handed back to the names it shares a word with, best score first.
+        """
+        cursor = (
+            certificates_col.find(
+                {"$text": {"$search": " ".join(holder_names)}, "is_revoked": {"$ne": True}},
+                projection=CANDIDATE_PROJECTION,
+            )
+            .sort([("score", {"$meta": "textScore"})])
+            .limit(CANDIDATE_LIMIT * len(holder_names))
+        )
+
+        # Stream the cursor, routing each document as it arrives; stop once
+        # every name has its fill of candidates
+        name_words = {name: set(_normalize(name).split()) for name in holder_names}
+        candidates: Dict[str, list] = {name: [] for name in holder_names}
+        open_names = set(holder_names)
+        try:
+            async for doc in cursor:
+                holder_words = set(self._field_text(doc, "holder_name").split())
+                for name in tuple(open_names):
+                    if not name_words[name].isdisjoint(holder_words):
+                        candidates[name].append(doc)
+                        if len(candidates[name]) >= CANDIDATE_LIMIT:
+                            open_names.discard(name)
+                if not open_names:
+                    break
+        finally:
+            # Release the server-side cursor when stopping early
+            await cursor.close()
+        return candidates
+
+    @staticmethod
+    def _length_can_match(str1: str, str2: str) -> bool:
+        """
+        Whether the lengths alone allow fuzz.ratio to reach the threshold.
+
+        fuzz.ratio is at most 2 * min(len) / (len1 + len2), so pairs whose
+        lengths differ too much are rejected without scoring.
+        """
+        total = len(str1) + len(str2)
+        return total > 0 and 200 * min(len(str1), len(str2)) >= MATCH_THRESHOLD * total
+
+    @staticmethod
+    def _field_text(cert: Dict[str, Any], field: str) -> str:
+        """Normalized text of a certificate field ("" for non-string values)."""
+        value = cert.get(field)
+        return _normalize(value) if isinstance(value, str) else ""
 
     def _calculate_score(self, matches: list) -> float:
         """Calculate score based on matches."""
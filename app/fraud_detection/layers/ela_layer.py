@@ -1,15 +1,58 @@
 """Layer 2: Error Level Analysis (ELA) (0-20 points)."""
-from app.fraud_detection.base import FraudDetectionLayer
+from app.fraud_detection.base import FraudDetectionLayer, ImageInput
+from app.core.config import get_settings
+from app.fraud_detection.layers._ela_kernel import ELAStats, ela_stats
 from PIL import Image
 import cv2
 import numpy as np
 import io
 import base64
-from typing import Dict, Any
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional
+import asyncio
 import logging
+import multiprocessing
 
 logger = logging.getLogger(__name__)
 
+# Score bands: consistency above _CONSISTENCY_BANDS[i] earns _BAND_SCORES[i + 1]
+_CONSISTENCY_BANDS = (0.2, 0.4, 0.6, 0.8)
+_BAND_SCORES = (0.0, 5.0, 8.0, 15.0, 18.0)
+
+# Process-wide pool for the CPU-bound analysis, started on first use
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared ELA worker pool, or None when ELA_PROCESS_WORKERS is 0."""
+    global _process_pool
+    workers = get_settings().ELA_PROCESS_WORKERS
+    if _process_pool is None and workers > 0:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _process_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the ELA worker processes (application shutdown)."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def ela_worker(image_data: bytes, quality: int, include_heatmap: bool = False) -> Dict[str, Any]:
+    """Run the ELA computation on raw image bytes (pool worker entry point)."""
+    layer = ELALayer()
+    layer.quality = quality
+    with Image.open(io.BytesIO(image_data)) as image:
+        pixels = np.ascontiguousarray(image.convert("RGB"), dtype=np.uint8)
+    return layer._analyze_pixels(pixels, include_heatmap)
+
 
 class ELALayer(FraudDetectionLayer):
     """Error Level Analysis layer for compression artifacts."""
@@ -18,62 +61,25 @@ class ELALayer(FraudDetectionLayer):
         super().__init__(max_score=20.0)
         self.quality = 90
 
-    async def analyze(self, image_data: bytes) -> Dict[str, Any]:
+    async def analyze(self, image_data: ImageInput, include_heatmap: bool = False) -> Dict[str, Any]:
         """
         Perform Error Level Analysis to detect image manipulation.
         High consistency = authentic, High variation = suspicious.
+        The WebP heatmap is only rendered when ``include_heatmap`` is set.
         """
         try:
-            image = self._load_image(image_data)
-            image_array = np.array(image)
-
-            # Convert to RGB if needed
-            if len(image_array.shape) == 2:
-                image_array = cv2.cvtColor(image_array, cv2.COLOR_GRAY2RGB)
-            elif image_array.shape[2] == 4:
-                image_array = cv2.cvtColor(image_array, cv2.COLOR_RGBA2RGB)
-
-            # Compress image to JPEG
-            _, compressed = cv2.imencode('.jpg', image_array, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
-            compressed_image = cv2.imdecode(compressed, cv2.IMREAD_COLOR)
-
-            # Calculate absolute difference
-            diff = cv2.absdiff(image_array, compressed_image).astype(float)
-            diff_gray = cv2.cvtColor(diff.astype(np.uint8), cv2.COLOR_RGB2GRAY)
-
-            # Generate heatmap
-            heatmap = cv2.applyColorMap((diff_gray * 10).astype(np.uint8), cv2.COLORMAP_JET)
-            heatmap_base64 = self._encode_heatmap(heatmap)
-
-            # Calculate consistency
-            consistency = self._calculate_consistency(diff_gray)
-            score = self._calculate_score(consistency)
-
-            # Detect cloning/splicing
-            cloning_detected = self._detect_cloning(diff_gray)
-            splicing_detected = self._detect_splicing(diff_gray)
-
-            flags = []
-            if consistency < 0.3:
-                flags.append("High image manipulation detected")
-            if cloning_detected:
-                flags.append("Possible copy-paste regions detected")
-            if splicing_detected:
-                flags.append("Possible splicing detected")
-
-            return {
-                "score": score,
-                "consistency_percentage": consistency * 100,
-                "heatmap_base64": heatmap_base64,
-                "cloning_detected": cloning_detected,
-                "splicing_detected": splicing_detected,
-                "suspicious_regions": [],
-                "details": {
-                    "method": "Error Level Analysis",
-                    "quality": self.quality,
-                },
-                "flags": flags,
-            }
+            ctx = self._context(image_data)
+            pool = _get_process_pool()
+            if pool is None:
+                # Shared RGB array, decoded once per pipeline run
+                return self._analyze_pixels(ctx.pixels, include_heatmap)
+
+            # The CPU-bound work runs in a worker process, off the GIL; the
+            # compressed bytes are cheaper to send than decoded pixels
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                pool, ela_worker, ctx.image_data, self.quality, include_heatmap
+            )
         except Exception as e:
             logger.error(f"ELA analysis error: {str(e)}")
             return {
@@ -87,39 +93,78 @@ class ELALayer(FraudDetectionLayer):
                 "flags": [f"ELA error: {str(e)}"],
             }
 
-    def _calculate_consistency(self, diff: np.ndarray) -> float:
+    def _analyze_pixels(self, image_array: np.ndarray, include_heatmap: bool = False) -> Dict[str, Any]:
+        """Error Level Analysis of an RGB uint8 array."""
+        # Compress image to JPEG and back
+        compressed_image = self._jpeg_roundtrip(image_array)
+
+        # Gray difference and its histogram, from one sweep
+        stats = ela_stats(image_array, compressed_image)
+
+        # Generate heatmap (debug output; skipped unless requested)
+        heatmap_base64 = self._encode_heatmap(stats.heatmap()) if include_heatmap else None
+
+        # Calculate consistency
+        consistency = self._calculate_consistency(stats)
+        score = self._calculate_score(consistency)
+
+        # Detect cloning/splicing
+        cloning_detected = self._detect_cloning(stats)
+        splicing_detected = self._detect_splicing(stats.gray_diff)
+
+        flags = []
+        if consistency < 0.3:
+            flags.append("High image manipulation detected")
+        if cloning_detected:
+            flags.append("Possible copy-paste regions detected")
+        if splicing_detected:
+            flags.append("Possible splicing detected")
+
+        return {
+            "score": score,
+            "consistency_percentage": consistency * 100,
+            "heatmap_base64": heatmap_base64,
+            "cloning_detected": cloning_detected,
+            "splicing_detected": splicing_detected,
+            "suspicious_regions": [],
+            "details": {
+                "method": "Error Level Analysis",
+                "quality": self.quality,
+            },
+            "flags": flags,
+        }
+
+    def _jpeg_roundtrip(self, image_array: np.ndarray) -> np.ndarray:
+        """
+        Re-encode an RGB array as JPEG at ``self.quality`` and decode it.
+
+        Pillow's bundled libjpeg-turbo works on the RGB array as-is, so no
+        channel swapping is needed (cv2 would treat it as BGR).
+        """
+        buffer = io.BytesIO()
+        Image.fromarray(image_array).save(buffer, format="JPEG", quality=self.quality)
+        buffer.seek(0)
+        with Image.open(buffer) as compressed:
+            # An RGB source decodes to RGB; convert() would only copy it
+            if compressed.mode != "RGB":
+                compressed = compressed.convert("RGB")
+            return np.asarray(compressed)
+
+    def _calculate_consistency(self, stats: ELAStats) -> float:
         """Calculate image consistency (0-1, higher is better)."""
-        try:
-            mean_diff = np.mean(diff)
-            max_diff = np.max(diff)
-            if max_diff == 0:
-                return 1.0
-            return 1.0 - min(mean_diff / max_diff, 1.0)
-        except Exception:
-            return 0.5
+        if stats.max == 0:
+            return 1.0
+        return 1.0 - min(stats.mean / stats.max, 1.0)
 
     def _calculate_score(self, consistency: float) -> float:
-        """Calculate score based on consistency."""
-        if consistency > 0.8:
-            return 18.0  # Very authentic
-        elif consistency > 0.6:
-            return 15.0
-        elif consistency > 0.4:
-            return 8.0
-        elif consistency > 0.2:
-            return 5.0
-        else:
-            return 0.0  # Highly suspicious
-
-    def _detect_cloning(self, diff: np.ndarray) -> bool:
+        """Calculate score based on consistency (18 = very authentic, 0 = highly suspicious)."""
+        return _BAND_SCORES[bisect_left(_CONSISTENCY_BANDS, consistency)]
+
+    def _detect_cloning(self, stats: ELAStats) -> bool:
         """Detect possible copy-paste cloning."""
-        try:
-            threshold = np.percentile(diff, 90)
-            cloned_regions = np.sum(diff > threshold)
-            total_pixels = diff.size
-            return (cloned_regions / total_pixels) > 0.05
-        except Exception:
-            return False
+        threshold = stats.percentile(90)
+        cloned_regions = stats.count_above(threshold)
+        return (cloned_regions / stats.gray_diff.size) > 0.05
 
     def _detect_splicing(self, diff: np.ndarray) -> bool:
         """Detect possible image splicing."""
@@ -132,9 +177,9 @@ class ELALayer(FraudDetectionLayer):
             return False
 
     def _encode_heatmap(self, heatmap: np.ndarray) -> str:
-        """Encode heatmap as base64 PNG."""
+        """Encode heatmap as base64 WebP."""
         try:
-            _, buffer = cv2.imencode('.png', heatmap)
+            _, buffer = cv2.imencode('.webp', heatmap, [cv2.IMWRITE_WEBP_QUALITY, 70])
             return base64.b64encode(buffer).decode()
         except Exception:
             return ""
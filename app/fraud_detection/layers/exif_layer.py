@@ -1,14 +1,24 @@
 """Layer 1: EXIF Metadata Analysis (0-20 points)."""
-from app.fraud_detection.base import FraudDetectionLayer
+from app.fraud_detection.base import FraudDetectionLayer, ImageInput
 from PIL import Image
-from PIL.ExifTags import TAGS
+from PIL.ExifTags import IFD, TAGS
+from cachetools import TTLCache
 from typing import Dict, Any
 import io
-from datetime import datetime
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Substrings of Software tags written by image editors, matched in one
+# case-insensitive scan
+SUSPICIOUS_SOFTWARE = ("photoshop", "gimp", "paint", "pixlr")
+_SUSPICIOUS_SOFTWARE_RE = re.compile("|".join(map(re.escape, SUSPICIOUS_SOFTWARE)), re.IGNORECASE)
+
+# Analysis results keyed by the image's SHA-256, so re-verifying the same
+# certificate skips the parse
+_RESULT_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
 
 class EXIFLayer(FraudDetectionLayer):
     """EXIF metadata analysis layer."""
@@ -16,13 +26,19 @@ class EXIFLayer(FraudDetectionLayer):
     def __init__(self):
         super().__init__(max_score=20.0)
 
-    async def analyze(self, image_data: bytes) -> Dict[str, Any]:
+    async def analyze(self, image_data: ImageInput) -> Dict[str, Any]:
         """
         Analyze image EXIF metadata.
         Baseline: 20 points. Subtract for suspicious indicators.
         """
+        ctx = self._context(image_data)
+        digest = await ctx.sha256()
+        cached = _RESULT_CACHE.get(digest)
+        if cached is not None:
+            return {**cached, "flags": list(cached["flags"]), "details": dict(cached["details"])}
+
         try:
-            image = self._load_image(image_data)
+            image = ctx.image
             score = self._get_base_score()
             flags = []
             details = {}
@@ -40,8 +56,7 @@ class EXIFLayer(FraudDetectionLayer):
             if software:
                 details["software"] = software
                 # Check for editing software
-                suspicious_software = ["photoshop", "gimp", "paint", "pixlr"]
-                if any(soft in software.lower() for soft in suspicious_software):
+                if _SUSPICIOUS_SOFTWARE_RE.search(software):
                     score -= 10
                     flags.append(f"Suspicious software detected: {software}")
 
@@ -68,7 +83,7 @@ class EXIFLayer(FraudDetectionLayer):
 
             score = self._validate_score(score)
 
-            return {
+            result = {
                 "score": score,
                 "has_exif": bool(exif_data),
                 "software_used": software or None,
@@ -77,6 +92,8 @@ class EXIFLayer(FraudDetectionLayer):
                 "flags": flags,
                 "details": details,
             }
+            _RESULT_CACHE[digest] = {**result, "flags": list(flags), "details": dict(details)}
+            return result
         except Exception as e:
             logger.error(f"EXIF analysis error: {str(e)}")
             return {
@@ -90,15 +107,18 @@ class EXIFLayer(FraudDetectionLayer):
             }
 
     def _extract_exif(self, image: Image.Image) -> Dict[str, Any]:
-        """Extract EXIF data from image."""
+        """Extract EXIF data (IFD0 plus the Exif sub-IFD) from image."""
         try:
+            # Public getexif() works for every format Pillow reads EXIF from,
+            # not only JPEG/WebP like the private _getexif()
+            exif = image.getexif()
+            if not exif:
+                return {}
             exif_data = {}
-            if hasattr(image, "_getexif") and callable(image._getexif):
-                exif = image._getexif()
-                if exif:
-                    for tag_id, value in exif.items():
-                        tag_name = TAGS.get(tag_id, tag_id)
-                        exif_data[tag_name] = str(value)[:100]  # Limit string length
+            for tags in (exif, exif.get_ifd(IFD.Exif)):
+                for tag_id, value in tags.items():
+                    tag_name = TAGS.get(tag_id, tag_id)
+                    exif_data[tag_name] = str(value)[:100]  # Limit string length
             return exif_data
         except Exception as e:
             logger.debug(f"Error extracting EXIF: {str(e)}")
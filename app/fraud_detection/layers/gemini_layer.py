@@ -1,14 +1,68 @@
 """Layer 3: AI Vision Analysis with Gemini Flash 2.0 (0-20 points)."""
-from app.fraud_detection.base import FraudDetectionLayer
+from app.fraud_detection.base import FraudDetectionLayer, ImageInput, LayerContext
+from app.fraud_detection.layers._local_vision import get_local_model
 from app.core.config import get_settings
-from typing import Dict, Any
+from app.core.redis_client import get_cache, set_cache
+from typing import Dict, Any, List, Optional, Tuple
 import base64
 import asyncio
 import logging
+import time
 import aiohttp
+import numpy as np
+import orjson
 
 logger = logging.getLogger(__name__)
 
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+# Inline batch jobs are capped at 20 MB of request payload; larger bulk runs
+# are split into several jobs (submitted concurrently)
+BATCH_MAX_INLINE_BYTES = 20 * 1024 * 1024
+
+# Terminal batch states other than success
+BATCH_FAILED_STATES = frozenset({
+    "BATCH_STATE_FAILED",
+    "BATCH_STATE_CANCELLED",
+    "BATCH_STATE_EXPIRED",
+})
+
+# Parsed Gemini results are cached under gemini:<sha256 of the image>
+GEMINI_CACHE_PREFIX = "gemini:"
+PARSE_FAILURE_FLAG = "Failed to parse Gemini response"
+
+# Points _calculate_score can award without OCR (seal, layout, editing); a
+# local-model score is scaled from this to the layer's full 20
+LOCAL_MAX_POINTS = 15.0
+
+# Long-lived HTTP session so Gemini calls reuse pooled keep-alive connections
+# instead of paying DNS + TCP + TLS setup on every verification
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """The shared Gemini HTTP session, created on first use."""
+    global _session
+    # Created without awaiting, so concurrent callers cannot race here
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=50,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            ),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared Gemini HTTP session (application shutdown)."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
 
 class GeminiLayer(FraudDetectionLayer):
     """AI Vision analysis using Google Gemini Flash 2.0."""
@@ -18,7 +72,7 @@ class GeminiLayer(FraudDetectionLayer):
         self.settings = get_settings()
         self.timeout = self.settings.GEMINI_TIMEOUT
 
-    async def analyze(self, image_data: bytes) -> Dict[str, Any]:
+    async def analyze(self, image_data: ImageInput) -> Dict[str, Any]:
         """
         Analyze certificate using Gemini AI for:
         - Seal/logo authenticity
@@ -31,92 +85,319 @@ class GeminiLayer(FraudDetectionLayer):
             if self.settings.DEMO_MODE or not self.settings.GEMINI_API_KEY:
                 return self._get_demo_response()
 
-            # Encode image to base64
-            image_base64 = base64.b64encode(image_data).decode("utf-8")
+            ctx = self._context(image_data)
+            cache_key = None
+            result = None
+            if self.settings.GEMINI_CACHE_ENABLED:
+                # Re-uploads of the same image reuse the earlier analysis
+                cache_key = GEMINI_CACHE_PREFIX + await ctx.sha256()
+                result = await self._get_cached_result(cache_key)
 
-            # Call Gemini API
-            result = await self._call_gemini_api(image_base64)
-            score = self._calculate_score(result)
+            if result is None:
+                # A confident on-device classification answers without the
+                # network round-trip; ambiguous images still go to Gemini
+                local = await self._local_analysis(ctx)
+                if local is not None and local[1] >= self.settings.LOCAL_VISION_CONFIDENCE:
+                    return self._build_local_result(*local)
 
-            return {
-                "score": score,
-                "seal_authentic": result.get("seal_authentic", False),
-                "seal_confidence": result.get("seal_confidence", 0.5),
-                "extracted_text": result.get("extracted_text", ""),
-                "ocr_confidence": result.get("ocr_confidence", 0.5),
-                "layout_professional": result.get("layout_professional", True),
-                "detected_editing": result.get("detected_editing", False),
-                "extracted_details": result.get("extracted_details", {}),
-                "details": result,
-                "flags": result.get("flags", []),
-            }
+                # Call Gemini API; failures come back as None rather than raising
+                result = await self._call_gemini_api(ctx.image_data)
+                if result is None:
+                    return self._get_error_response("Gemini API unavailable")
+                if cache_key and PARSE_FAILURE_FLAG not in result.get("flags", []):
+                    await self._cache_result(cache_key, result)
+            return self._build_result(result)
         except Exception as e:
             logger.error(f"Gemini analysis error: {str(e)}")
-            return {
-                "score": 10.0,  # Neutral score on error
-                "seal_authentic": False,
-                "seal_confidence": 0.0,
-                "extracted_text": "",
-                "ocr_confidence": 0.0,
-                "layout_professional": False,
-                "detected_editing": False,
-                "extracted_details": {},
-                "details": {},
-                "flags": [f"Gemini analysis failed: {str(e)}"],
-            }
+            return self._get_error_response(str(e))
+
+    async def batch_analyze(
+        self,
+        items: List[Tuple[str, ImageInput]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze many certificates through the Gemini Batch API.
+
+        ``items`` are (key, image) pairs; returns {key: analyze() result}.
+        Cached images are answered directly, the rest go out as inline batch
+        jobs that are polled until done (GEMINI_BATCH_TIMEOUT). Batch jobs
+        are billed at a discount but can take minutes, so this suits bulk
+        re-verification rather than interactive requests.
+        """
+        if self.settings.DEMO_MODE or not self.settings.GEMINI_API_KEY:
+            return {key: self._get_demo_response() for key, _ in items}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        cache_keys: Dict[str, str] = {}
+        pending: List[Tuple[str, Dict[str, Any]]] = []
+        for key, image_data in items:
+            ctx = self._context(image_data)
+            if self.settings.GEMINI_CACHE_ENABLED:
+                cache_keys[key] = GEMINI_CACHE_PREFIX + await ctx.sha256()
+                cached = await self._get_cached_result(cache_keys[key])
+                if cached is not None:
+                    results[key] = self._build_result(cached)
+                    continue
+            image_base64 = base64.b64encode(ctx.image_data).decode("utf-8")
+            pending.append((key, self._build_request(image_base64)))
+
+        # Split into jobs under the inline payload limit
+        jobs: List[List[Tuple[str, Dict[str, Any]]]] = []
+        job_bytes = 0
+        for key, request in pending:
+            size = len(request["contents"][0]["parts"][1]["inline_data"]["data"])
+            if not jobs or job_bytes + size > BATCH_MAX_INLINE_BYTES:
+                jobs.append([])
+                job_bytes = 0
+            jobs[-1].append((key, request))
+            job_bytes += size
+
+        parsed: Dict[str, Optional[Dict[str, Any]]] = {}
+        for job_results in await asyncio.gather(*(self._run_batch_job(job) for job in jobs)):
+            parsed.update(job_results)
+
+        for key, _ in pending:
+            result = parsed.get(key)
+            if result is None:
+                results[key] = self._get_error_response("Gemini batch job did not return a result")
+                continue
+            if key in cache_keys and PARSE_FAILURE_FLAG not in result.get("flags", []):
+                await self._cache_result(cache_keys[key], result)
+            results[key] = self._build_result(result)
+        return results
+
+    async def _run_batch_job(
+        self,
+        requests: List[Tuple[str, Dict[str, Any]]],
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Submit one inline batch job, poll it to completion and parse its
+        responses. Returns {key: parsed result}; keys that failed are absent.
+        """
+        params = {"key": self.settings.GEMINI_API_KEY}
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        body = {
+            "batch": {
+                "display_name": f"credify-{int(time.time())}",
+                "input_config": {
+                    "requests": {
+                        "requests": [
+                            {"request": request, "metadata": {"key": key}}
+                            for key, request in requests
+                        ],
+                    },
+                },
+            },
+        }
 
-    async def _call_gemini_api(self, image_base64: str) -> Dict[str, Any]:
-        """Call Google Gemini API with vision model."""
+        try:
+            session = get_session()
+            async with session.post(
+                f"{GEMINI_API_BASE}/models/{self.settings.GEMINI_MODEL}:batchGenerateContent",
+                params=params,
+                data=await asyncio.to_thread(orjson.dumps, body),
+                headers={"Content-Type": "application/json"},
+                timeout=timeout,
+            ) as response:
+                if response.status != 200:
+                    logger.error(f"Gemini batch submit error: {response.status} - {await response.text()}")
+                    return {}
+                operation = await response.json(loads=orjson.loads)
+
+            # Poll with capped exponential backoff until the job is done
+            name = operation["name"]
+            deadline = time.monotonic() + self.settings.GEMINI_BATCH_TIMEOUT
+            delay = 5.0
+            while not operation.get("done"):
+                if time.monotonic() + delay > deadline:
+                    logger.warning(f"Gemini batch {name} did not finish in time")
+                    return {}
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+                async with session.get(
+                    f"{GEMINI_API_BASE}/{name}", params=params, timeout=timeout
+                ) as response:
+                    if response.status != 200:
+                        logger.warning(f"Gemini batch poll error: {response.status}")
+                        continue
+                    operation = await response.json(loads=orjson.loads)
+
+            state = operation.get("metadata", {}).get("state")
+            if "error" in operation or state in BATCH_FAILED_STATES:
+                logger.error(f"Gemini batch {name} failed: {operation.get('error') or state}")
+                return {}
+        except asyncio.TimeoutError:
+            logger.warning("Gemini batch API timeout")
+            return {}
+        except (aiohttp.ClientError, KeyError) as e:
+            logger.error(f"Gemini batch API error: {str(e)}")
+            return {}
+
+        # Responses carry the request metadata back; fall back to order
+        inlined = operation.get("response", {}).get("inlinedResponses", {}).get("inlinedResponses", [])
+        parsed: Dict[str, Optional[Dict[str, Any]]] = {}
+        for (request_key, _), item in zip(requests, inlined):
+            key = item.get("metadata", {}).get("key", request_key)
+            if "response" in item:
+                parsed[key] = self._parse_gemini_response(item["response"])
+        return parsed
+
+    def _build_request(self, image_base64: str) -> Dict[str, Any]:
+        """generateContent request body for one certificate image."""
+        return {
+            "contents": [
+                {
+                    "parts": [
+                        {
+                            "text": self._get_analysis_prompt()
+                        },
+                        {
+                            "inline_data": {
+                                "mime_type": "image/jpeg",
+                                "data": image_base64
+                            }
+                        }
+                    ]
+                }
+            ]
+        }
+
+    def _build_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Layer result for a parsed Gemini analysis."""
+        return {
+            "score": self._calculate_score(result),
+            "seal_authentic": result.get("seal_authentic", False),
+            "seal_confidence": result.get("seal_confidence", 0.5),
+            "extracted_text": result.get("extracted_text", ""),
+            "ocr_confidence": result.get("ocr_confidence", 0.5),
+            "layout_professional": result.get("layout_professional", True),
+            "detected_editing": result.get("detected_editing", False),
+            "extracted_details": result.get("extracted_details", {}),
+            "details": result,
+            "flags": result.get("flags", []),
+        }
+
+    async def _local_analysis(
+        self,
+        ctx: LayerContext,
+    ) -> Optional[Tuple[Dict[str, float], float]]:
+        """
+        Run the local classifier on a worker thread.
+
+        Returns (head probabilities, confidence), or None when no model is
+        configured or inference fails.
+        """
+        path = self.settings.LOCAL_VISION_MODEL_PATH
+        if not path:
+            return None
+
+        def infer(pixels: np.ndarray) -> Optional[Tuple[Dict[str, float], float]]:
+            model = get_local_model(path)
+            return model.predict(pixels) if model is not None else None
+
+        try:
+            # Decoded here, on the loop: the shared PIL image is also read by
+            # the other layers, so the worker thread only gets the array
+            return await asyncio.to_thread(infer, ctx.pixels)
+        except Exception as e:
+            logger.error(f"Local vision inference error: {str(e)}")
+            return None
+
+    def _build_local_result(self, probabilities: Dict[str, float], confidence: float) -> Dict[str, Any]:
+        """Layer result from the local classifier's probabilities."""
+        detected_editing = probabilities["detected_editing"] >= 0.5
+        result = {
+            "seal_authentic": probabilities["seal_authentic"] >= 0.5,
+            "seal_confidence": probabilities["seal_authentic"],
+            "extracted_text": "",
+            "ocr_confidence": 0.0,
+            "layout_professional": probabilities["layout_professional"] >= 0.5,
+            "detected_editing": detected_editing,
+            "extracted_details": {},
+            "flags": ["Signs of editing detected by local model"] if detected_editing else [],
+            "analysis_source": "local_model",
+            "local_confidence": confidence,
+        }
+        built = self._build_result(result)
+        # No OCR runs locally, so the text points are not on offer
+        built["score"] = self._validate_score(
+            self._calculate_score(result) * self.max_score / LOCAL_MAX_POINTS
+        )
+        return built
+
+    async def _get_cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached Gemini result for ``key``, or None (also when Redis is down)."""
+        try:
+            cached = await get_cache(key)
+        except Exception as e:
+            logger.debug(f"Gemini cache unavailable: {str(e)}")
+            return None
+        return cached if isinstance(cached, dict) else None
+
+    async def _cache_result(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a parsed Gemini result for GEMINI_CACHE_TTL seconds."""
+        try:
+            await set_cache(key, result, expire=self.settings.GEMINI_CACHE_TTL)
+        except Exception as e:
+            logger.debug(f"Gemini cache unavailable: {str(e)}")
+
+    def _get_error_response(self, reason: str) -> Dict[str, Any]:
+        """Return a neutral result when the analysis could not run."""
+        return {
+            "score": 10.0,  # Neutral score on error
+            "seal_authentic": False,
+            "seal_confidence": 0.0,
+            "extracted_text": "",
+            "ocr_confidence": 0.0,
+            "layout_professional": False,
+            "detected_editing": False,
+            "extracted_details": {},
+            "details": {},
+            "flags": [f"Gemini analysis failed: {reason}"],
+        }
+
+    def _encode_payload(self, image_data: bytes) -> bytes:
+        """generateContent request body for ``image_data``, as JSON bytes."""
+        image_base64 = base64.b64encode(image_data).decode("ascii")
+        return orjson.dumps(self._build_request(image_base64))
+
+    async def _call_gemini_api(self, image_data: bytes) -> Optional[Dict[str, Any]]:
+        """Call Google Gemini API with vision model; returns None on failure."""
         try:
             # Prepare API request
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.settings.GEMINI_MODEL}:generateContent"
+            url = f"{GEMINI_API_BASE}/models/{self.settings.GEMINI_MODEL}:generateContent"
 
             headers = {
                 "Content-Type": "application/json",
             }
 
-            payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {
-                                "text": self._get_analysis_prompt()
-                            },
-                            {
-                                "inline_data": {
-                                    "mime_type": "image/jpeg",
-                                    "data": image_base64
-                                }
-                            }
-                        ]
-                    }
-                ]
-            }
+            # Base64 + JSON of a multi-MB image is built on a worker thread
+            # so the event loop keeps serving other requests
+            payload = await asyncio.to_thread(self._encode_payload, image_data)
 
             # Add API key
             url = f"{url}?key={self.settings.GEMINI_API_KEY}"
 
             # Call API with timeout
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    url,
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_gemini_response(data)
-                    else:
-                        error_text = await response.text()
-                        raise Exception(f"Gemini API error: {response.status} - {error_text}")
+            async with get_session().post(
+                url,
+                data=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json(loads=orjson.loads)
+                    return self._parse_gemini_response(data)
+                error_text = await response.text()
+                logger.error(f"Gemini API error: {response.status} - {error_text}")
+                return None
 
         except asyncio.TimeoutError:
             logger.warning("Gemini API timeout")
-            raise Exception("Gemini API timeout")
-        except Exception as e:
+            return None
+        except aiohttp.ClientError as e:
             logger.error(f"Gemini API call error: {str(e)}")
-            raise
+            return None
 
     def _get_analysis_prompt(self) -> str:
         """Get the detailed analysis prompt for Gemini."""
@@ -139,15 +420,12 @@ Return only valid JSON."""
             contents = response.get("candidates", [{}])[0].get("content", {})
             text = contents.get("parts", [{}])[0].get("text", "")
 
-            # Try to parse JSON from response
-            import json
-            import re
-
-            # Extract JSON from response text
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return result
+            # Extract JSON from response text: the span from the first "{" to
+            # the last "}" (what a greedy r"\{.*\}" DOTALL search matched)
+            start = text.find("{")
+            end = text.rfind("}")
+            if start != -1 and end > start:
+                return orjson.loads(text[start:end + 1])
 
             # Fallback to default response
             return {
@@ -170,7 +448,7 @@ Return only valid JSON."""
                 "layout_professional": True,
                 "detected_editing": False,
                 "extracted_details": {},
-                "flags": ["Failed to parse Gemini response"],
+                "flags": [PARSE_FAILURE_FLAG],
             }
 
     def _calculate_score(self, result: Dict[str, Any]) -> float:
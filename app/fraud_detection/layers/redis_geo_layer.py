@@ -1,11 +1,6 @@
 """Layer 6: Geo-Fraud Pattern Detection (0-10 points)."""
-from app.fraud_detection.base import FraudDetectionLayer
-from app.core.redis_client import (
-    get_redis,
-    add_geo_fraud_cluster,
-    get_geo_cluster_count,
-    is_ip_blacklisted,
-)
+from app.fraud_detection.base import FraudDetectionLayer, ImageInput
+from app.core.redis_client import geo_fraud_check
 from typing import Dict, Any, Optional
 import logging
 
@@ -20,7 +15,7 @@ class RedisGeoLayer(FraudDetectionLayer):
 
     async def analyze(
         self,
-        image_data: bytes,
+        image_data: ImageInput,
         ip_address: str = None,
         geolocation: Dict[str, Any] = None,
     ) -> Dict[str, Any]:
@@ -41,8 +36,13 @@ class RedisGeoLayer(FraudDetectionLayer):
                     "city": "Unknown",
                 }
 
-            # Check if IP is blacklisted
-            ip_blacklisted = await is_ip_blacklisted(ip_address)
+            # Check the IP blacklist and add the IP to its geo cluster in one
+            # round-trip; blacklisted IPs are not added
+            ip_blacklisted, cluster_count = await geo_fraud_check(
+                geolocation.get("latitude", 0),
+                geolocation.get("longitude", 0),
+                ip_address,
+            )
             if ip_blacklisted:
                 return {
                     "score": -10.0,
@@ -60,33 +60,13 @@ class RedisGeoLayer(FraudDetectionLayer):
             anomalies = []
             score = 10.0  # Start with perfect score
 
-            try:
-                redis = get_redis()
-
-                # Add IP to geo cluster
-                await add_geo_fraud_cluster(
-                    geolocation.get("latitude", 0),
-                    geolocation.get("longitude", 0),
-                    ip_address,
-                )
-
-                # Get cluster count
-                cluster_count = await get_geo_cluster_count(
-                    geolocation.get("latitude", 0),
-                    geolocation.get("longitude", 0),
-                )
-
-                # Detect patterns
-                if cluster_count > 50:
-                    anomalies.append("High volume of verifications from same location")
-                    score -= 8
-                elif cluster_count > 20:
-                    anomalies.append("Moderate clustering detected")
-                    score -= 3
-
-            except Exception as e:
-                logger.debug(f"Redis geo analysis error: {str(e)}")
-                # Continue without Redis
+            # Detect patterns (count is 0 when Redis was unavailable)
+            if cluster_count > 50:
+                anomalies.append("High volume of verifications from same location")
+                score -= 8
+            elif cluster_count > 20:
+                anomalies.append("Moderate clustering detected")
+                score -= 3
 
             # Detect geographic impossibilities
             # (In a real implementation, would compare with previous verifications)
@@ -100,7 +80,7 @@ class RedisGeoLayer(FraudDetectionLayer):
                 "anomalies_detected": anomalies,
                 "fraud_ring_confidence": max(0, 1.0 - (score / 10.0)),
                 "details": {
-                    "cluster_count": cluster_count if 'cluster_count' in locals() else 0,
+                    "cluster_count": cluster_count,
                     "analysis_type": "geo_clustering",
                 },
                 "flags": anomalies if anomalies else ["No anomalies detected"],
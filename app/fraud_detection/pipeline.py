@@ -1,5 +1,6 @@
 """Fraud Detection Pipeline - orchestrates all 6 layers."""
-from motor.motor_asyncio import AsyncDatabase
+from pymongo.asynchronous.database import AsyncDatabase
+from app.fraud_detection.base import LayerContext
 from app.fraud_detection.layers import (
     EXIFLayer,
     ELALayer,
@@ -8,7 +9,7 @@ from app.fraud_detection.layers import (
     BlockchainLayer,
     RedisGeoLayer,
 )
-from typing import Dict, Any, Optional
+from typing import Awaitable, Dict, Any, List, Optional
 import time
 import asyncio
 import logging
@@ -28,6 +29,17 @@ class FraudDetectionPipeline:
     MAX_GEO = 10.0
     TOTAL_MAX = 100.0
 
+    # Layers in gather order, with the score each falls back to on error
+    LAYER_NAMES = ("exif", "ela", "gemini", "database", "blockchain", "geo")
+    NEUTRAL_SCORES = {
+        "exif": 10.0,
+        "ela": 10.0,
+        "gemini": 10.0,
+        "database": 0.0,
+        "blockchain": 0.0,
+        "geo": 10.0,
+    }
+
     def __init__(self, db: AsyncDatabase):
         """Initialize pipeline with database connection."""
         self.db = db
@@ -49,43 +61,94 @@ class FraudDetectionPipeline:
         Run complete fraud detection pipeline.
         Executes all 6 layers and calculates final verdict.
         """
-        start_time = time.time()
+        ctx = self._make_context(image_data, certificate_id, ip_address, geolocation)
+        return await self._verify_context(ctx)
 
-        try:
-            logger.info(f"Starting fraud detection for certificate {certificate_id}")
+    async def verify_batch(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run the pipeline for many certificates (bulk re-verification).
 
-            # Layer 1 & 2 & 4 & 6: Fast layers (can run in parallel)
-            layer1_task = asyncio.create_task(self.exif_layer.analyze(image_data))
-            layer2_task = asyncio.create_task(self.ela_layer.analyze(image_data))
-            layer4_task = asyncio.create_task(
-                self.database_layer.analyze(image_data)
-            )
-            layer6_task = asyncio.create_task(
-                self.geo_layer.analyze(image_data, ip_address, geolocation)
+        Each job is a dict of ``verify`` keyword arguments. Gemini analysis
+        for the whole batch goes through one Batch API submission; the
+        other layers still run per certificate, concurrently. Results are
+        returned in job order.
+        """
+        contexts = [
+            self._make_context(
+                job["image_data"],
+                job.get("certificate_id"),
+                job.get("ip_address"),
+                job.get("geolocation"),
             )
+            for job in jobs
+        ]
+        gemini_batch = asyncio.create_task(
+            self.gemini_layer.batch_analyze([(str(i), ctx) for i, ctx in enumerate(contexts)])
+        )
 
-            # Run fast layers in parallel
-            layer1_result, layer2_result, layer4_result, layer6_result = await asyncio.gather(
-                layer1_task,
-                layer2_task,
-                layer4_task,
-                layer6_task,
-            )
+        async def gemini_result(key: str) -> Dict[str, Any]:
+            return (await gemini_batch)[key]
 
-            # Layer 3: Gemini (slow but important, run in parallel)
-            layer3_task = asyncio.create_task(
-                self.gemini_layer.analyze(image_data)
-            )
+        return list(await asyncio.gather(*(
+            self._verify_context(ctx, gemini=gemini_result(str(i)))
+            for i, ctx in enumerate(contexts)
+        )))
 
-            # Layer 5: Blockchain (slow)
-            layer5_task = asyncio.create_task(
-                self.blockchain_layer.analyze(image_data, certificate_id)
-            )
+    @staticmethod
+    def _make_context(
+        image_data: bytes,
+        certificate_id: Optional[str],
+        ip_address: Optional[str],
+        geolocation: Optional[Dict[str, Any]],
+    ) -> LayerContext:
+        """Shared by all layers so the image is parsed once."""
+        return LayerContext(
+            image_data,
+            metadata={
+                "certificate_id": certificate_id,
+                "ip_address": ip_address,
+                "geolocation": geolocation,
+            },
+        )
+
+    async def _verify_context(
+        self,
+        ctx: LayerContext,
+        gemini: Optional[Awaitable[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run all 6 layers over one context. ``gemini`` supplies the Gemini
+        layer result (used by verify_batch); by default the layer is called.
+        """
+        start_time = time.time()
+        certificate_id = ctx.metadata["certificate_id"]
+        ip_address = ctx.metadata["ip_address"]
+        geolocation = ctx.metadata["geolocation"]
+
+        try:
+            logger.info(f"Starting fraud detection for certificate {certificate_id}")
 
-            # Wait for remaining layers
-            layer3_result, layer5_result = await asyncio.gather(
-                layer3_task,
-                layer5_task,
+            # All six layers are independent, so they run together and the
+            # pipeline takes as long as its slowest layer
+            results = await asyncio.gather(
+                self.exif_layer.analyze(ctx),
+                self.ela_layer.analyze(ctx),
+                gemini if gemini is not None else self.gemini_layer.analyze(ctx),
+                self.database_layer.analyze(ctx),
+                self.blockchain_layer.analyze(ctx, certificate_id),
+                self.geo_layer.analyze(ctx, ip_address, geolocation),
+                return_exceptions=True,
+            )
+            (
+                layer1_result,
+                layer2_result,
+                layer3_result,
+                layer4_result,
+                layer5_result,
+                layer6_result,
+            ) = (
+                self._layer_result(name, result)
+                for name, result in zip(self.LAYER_NAMES, results)
             )
 
             # Calculate total score
@@ -159,6 +222,19 @@ class FraudDetectionPipeline:
                 "layer_details": {},
             }
 
+    def _layer_result(self, name: str, result: Any) -> Dict[str, Any]:
+        """A layer's result, or its neutral fallback if the layer raised."""
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            logger.error(f"{name} layer error: {str(result)}")
+            return {
+                "score": self.NEUTRAL_SCORES[name],
+                "details": {},
+                "flags": [f"{name} layer error: {str(result)}"],
+            }
+        return result
+
     def _get_verdict(self, score: float) -> str:
         """Determine verdict based on confidence score."""
         if score >= 80:
@@ -25,25 +25,26 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import logging
-import sys
+import ssl
 
 from app.core.config import get_settings, validate_production_settings
 from app.core.database import connect_db, disconnect_db
 from app.core.redis_client import connect_redis, disconnect_redis
+from app.core.log_queue import access_log_queue
+from app.core.logging_config import setup_logging
+from app.core.token_blacklist import token_blacklist
+from app.services.fraud_broker import broker as fraud_broker
+from app.fraud_detection.layers.ela_layer import shutdown_process_pool
+from app.fraud_detection.layers.gemini_layer import close_session as close_gemini_session
 from app.core.exceptions import CredifyException
 from app.api.middleware import setup_middleware
 from app.api.routes import auth, certificates, verification, admin, health
 
 # ==================== LOGGING CONFIGURATION ====================
 
-# Configure logging with appropriate level based on environment
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-    ]
-)
+# Loggers only enqueue records; a listener thread writes them to stdout and
+# the rotating log file
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +70,8 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Credify application...")
     logger.info(f"Environment: {get_settings().ENVIRONMENT}")
     logger.info(f"Debug Mode: {get_settings().DEBUG}")
+    # hashlib's SHA-256 (certificate hashes) comes from this OpenSSL build
+    logger.info(f"Crypto backend: {ssl.OPENSSL_VERSION}")
     logger.info("=" * 60)
 
     settings = get_settings()
@@ -101,6 +104,24 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠ Failed to connect to Redis: {str(e)}")
         logger.warning("  Continuing without Redis (caching and rate limiting disabled)")
 
+    # Load the token blacklist filter and follow revocations from other workers
+    if redis_available:
+        try:
+            await token_blacklist.start()
+            logger.info("✓ Token blacklist filter loaded")
+        except Exception as e:
+            logger.warning(f"⚠ Token blacklist filter unavailable: {str(e)}")
+
+        # Single shared subscription feeding the admin fraud streams
+        try:
+            await fraud_broker.start()
+            logger.info("✓ Fraud event broker started")
+        except Exception as e:
+            logger.warning(f"⚠ Fraud event broker unavailable: {str(e)}")
+
+    # Start background access-log writer
+    access_log_queue.start()
+
     logger.info("-" * 60)
     logger.info("Credify application started successfully")
     logger.info("-" * 60)
@@ -113,6 +134,17 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down Credify application...")
     logger.info("=" * 60)
 
+    # Flush pending access-log records
+    await access_log_queue.stop()
+
+    # Stop following token revocations and fraud events
+    await token_blacklist.stop()
+    await fraud_broker.stop()
+
+    # Stop the fraud-detection worker processes and close their HTTP session
+    shutdown_process_pool()
+    await close_gemini_session()
+
     # Disconnect from MongoDB
     try:
         await disconnect_db()
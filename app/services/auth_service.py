@@ -1,14 +1,15 @@
 """Authentication service for user management."""
-from motor.motor_asyncio import AsyncDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 from bson import ObjectId
 from app.core.security import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     validate_password_strength,
     create_access_token,
     create_refresh_token,
 )
+from app.core.redis_client import invalidate_user_cache, revoke_user, restore_user
 from app.models.user import UserCreate, UserLogin
 from typing import Optional, Dict, Any
 import uuid
@@ -60,7 +61,7 @@ class AuthService:
             raise ValueError("Institution not found")
 
         # Hash password
-        password_hash = hash_password(user_data.password)
+        password_hash = await hash_password_async(user_data.password)
 
         # Create user document
         user_doc = {
@@ -118,7 +119,7 @@ class AuthService:
             raise ValueError("User account is inactive")
 
         # Verify password
-        if not verify_password(login_data.password, user.get("password_hash", "")):
+        if not await verify_password_async(login_data.password, user.get("password_hash", "")):
             raise ValueError("Invalid email or password")
 
         # Update last login
@@ -159,11 +160,15 @@ class AuthService:
             "institution_name": institution_name,
         }
 
-    async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user by ID."""
+    async def get_user_by_id(
+        self,
+        user_id: str,
+        projection: Optional[Dict[str, int]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Get user by ID, optionally limited to the fields in ``projection``."""
         try:
             user_obj_id = ObjectId(user_id)
-            user = await self.users_col.find_one({"_id": user_obj_id})
+            user = await self.users_col.find_one({"_id": user_obj_id}, projection)
             if user:
                 user["id"] = str(user.pop("_id"))
             return user
@@ -195,6 +200,11 @@ class AuthService:
                     }
                 }
             )
+            if update_data.get("is_active") is False:
+                await revoke_user(user_id)
+            elif update_data.get("is_active") is True:
+                await restore_user(user_id)
+            await invalidate_user_cache(user_id)
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Error updating user: {str(e)}")
@@ -213,6 +223,8 @@ class AuthService:
                     }
                 }
             )
+            await revoke_user(user_id)
+            await invalidate_user_cache(user_id)
             logger.info(f"User disabled: {user_id} - Reason: {reason}")
             return result.modified_count > 0
         except Exception as e:
@@ -233,7 +245,7 @@ class AuthService:
                 raise ValueError("User not found")
 
             # Verify old password
-            if not verify_password(old_password, user.get("password_hash", "")):
+            if not await verify_password_async(old_password, user.get("password_hash", "")):
                 raise ValueError("Current password is incorrect")
 
             # Validate new password
@@ -242,7 +254,7 @@ class AuthService:
                 raise ValueError(f"Password validation failed: {message}")
 
             # Hash and update new password
-            new_password_hash = hash_password(new_password)
+            new_password_hash = await hash_password_async(new_password)
             user_obj_id = ObjectId(user_id)
 
             result = await self.users_col.update_one(
@@ -1,5 +1,5 @@
 """Certificate service for certificate management."""
-from motor.motor_asyncio import AsyncDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 from bson import ObjectId
 from typing import Optional, Dict, Any
@@ -0,0 +1,137 @@
+"""Fan-out of fraud events from Redis pub/sub to connected admin streams."""
+from app.core.redis_client import get_redis
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Channel pattern fraud events are published under (e.g. fraud:detected)
+FRAUD_CHANNEL_PATTERN = "fraud:*"
+
+# Bounds, in seconds, of the wait before resubscribing after a Redis error
+RESUBSCRIBE_MIN_DELAY = 1.0
+RESUBSCRIBE_MAX_DELAY = 30.0
+
+
+class Broker:
+    """
+    Single Redis subscription shared by every fraud-stream connection.
+
+    One background task receives each event once and appends it to a bounded
+    queue per connected admin. A slow client only loses its own events; it
+    never holds up the listener or the other clients.
+    """
+
+    def __init__(self, queue_size: int = 1000):
+        """Initialize the broker (the listener is started separately)."""
+        self.queue_size = queue_size
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new client queue."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Remove a client queue."""
+        self.subscribers.discard(queue)
+
+    async def start(self) -> None:
+        """Subscribe to fraud channels and start the listener task."""
+        if self._task is not None:
+            return
+        pubsub = await self._subscribe()
+        self._task = asyncio.create_task(self._listen(pubsub))
+
+    async def _subscribe(self):
+        pubsub = get_redis().pubsub()
+        await pubsub.psubscribe(FRAUD_CHANNEL_PATTERN)
+        return pubsub
+
+    async def stop(self) -> None:
+        """Stop the listener task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen(self, pubsub) -> None:
+        """
+        Decode each event once and hand it to every subscriber.
+
+        If the subscription drops, resubscribe with a capped exponential
+        backoff so the admin streams resume without a restart.
+        """
+        delay = RESUBSCRIBE_MIN_DELAY
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+
+                    try:
+                        data = orjson.loads(message["data"])
+                    except orjson.JSONDecodeError:
+                        data = message["data"]
+                    event = {"channel": message["channel"], "data": data}
+
+                    for queue in self.subscribers:
+                        try:
+                            queue.put_nowait(event)
+                        except asyncio.QueueFull:
+                            pass
+                logger.warning("Fraud broker subscription ended")
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                logger.error("Fraud broker listener error: %s", e)
+
+            try:
+                await asyncio.sleep(delay)
+                await pubsub.close()
+                pubsub = await self._subscribe()
+                delay = RESUBSCRIBE_MIN_DELAY
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY)
+                logger.error("Fraud broker resubscribe failed: %s", e)
+
+
+async def next_batch(
+    queue: asyncio.Queue,
+    max_events: int = 64,
+    window: float = 0.02,
+) -> List[Dict[str, Any]]:
+    """Wait for one event, then collect more for up to ``window`` seconds."""
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + window
+
+    while len(batch) < max_events:
+        if not queue.empty():
+            batch.append(queue.get_nowait())
+            continue
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+
+    return batch
+
+
+# Shared broker for this process
+broker = Broker()
@@ -1,5 +1,5 @@
 """Verification service for fraud detection."""
-from motor.motor_asyncio import AsyncDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 from typing import Optional, Dict, Any
 import uuid
@@ -2,7 +2,7 @@
 import asyncio
 import sys
 import os
-from motor.motor_asyncio import AsyncClient
+from pymongo import AsyncMongoClient
 from datetime import datetime
 
 
@@ -17,7 +17,7 @@ async def get_current_version(db) -> int:
 
 async def run_migrations(connection_string: str, target_version: int = None) -> None:
     """Run migrations up to target version."""
-    client = AsyncClient(connection_string)
+    client = AsyncMongoClient(connection_string)
     db = client["credify"]
 
     current_version = await get_current_version(db)
@@ -29,7 +29,7 @@ async def run_migrations(connection_string: str, target_version: int = None) ->
 
     if not os.path.exists(versions_dir):
         print("No migrations found")
-        client.close()
+        await client.close()
         return
 
     for filename in sorted(os.listdir(versions_dir)):
@@ -57,13 +57,13 @@ async def run_migrations(connection_string: str, target_version: int = None) ->
             print(f"✗ Migration v{version:03d} failed: {str(e)}")
             raise
 
-    client.close()
+    await client.close()
     print("\n✓ All migrations completed successfully")
 
 
 async def rollback(connection_string: str, target_version: int) -> None:
     """Rollback to target version."""
-    client = AsyncClient(connection_string)
+    client = AsyncMongoClient(connection_string)
     db = client["credify"]
 
     current_version = await get_current_version(db)
@@ -83,13 +83,13 @@ async def rollback(connection_string: str, target_version: int) -> None:
             print(f"✗ Rollback failed: {str(e)}")
             raise
 
-    client.close()
+    await client.close()
     print("\n✓ Rollback completed successfully")
 
 
 async def get_status(connection_string: str) -> None:
     """Get current migration status."""
-    client = AsyncClient(connection_string)
+    client = AsyncMongoClient(connection_string)
     db = client["credify"]
 
     current_version = await get_current_version(db)
@@ -102,14 +102,27 @@ async def get_status(connection_string: str) -> None:
         for mig in migrations:
             print(f"  v{mig['version']:03d}: {mig['name']} - {mig['status']}")
 
-    client.close()
+    await client.close()
+
+
+async def ensure_indexes(connection_string: str) -> None:
+    """Create the application's indexes (see app.core.database.INDEXES)."""
+    from app.core.database import create_indexes
+
+    client = AsyncMongoClient(connection_string)
+    db = client["credify"]
+
+    await create_indexes(db)
+    print("✓ Indexes created")
+
+    await client.close()
 
 
 if __name__ == "__main__":
     mongo_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 
     if len(sys.argv) < 2:
-        print("Usage: python migrate.py [up|down|status] [target_version]")
+        print("Usage: python migrate.py [up|down|status|indexes] [target_version]")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -124,6 +137,8 @@ if __name__ == "__main__":
         asyncio.run(rollback(mongo_url, target_version))
     elif command == "status":
         asyncio.run(get_status(mongo_url))
+    elif command == "indexes":
+        asyncio.run(ensure_indexes(mongo_url))
     else:
         print("Unknown command")
         sys.exit(1)
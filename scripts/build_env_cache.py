@@ -0,0 +1,26 @@
+"""
+Precompute validated settings for fast worker start-up.
+
+Run at deploy time, after .env and the environment are final:
+
+    python -m scripts.build_env_cache
+
+Each worker then loads .env.cache.json instead of parsing .env; the cached
+values are still validated. Editing .env invalidates the cache, and workers
+ignore it whenever any settings variable is set in their own environment,
+so values supplied by the orchestrator always win.
+"""
+import sys
+
+from app.core.config import ENV_CACHE_FILE, Settings, dump_settings_cache
+
+
+def main() -> int:
+    """Validate settings from the environment and write the cache."""
+    dump_settings_cache(Settings())
+    print(f"Wrote {ENV_CACHE_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
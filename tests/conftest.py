@@ -3,7 +3,8 @@ import pytest
 import asyncio
 from datetime import datetime
 from bson import ObjectId
-from motor.motor_asyncio import AsyncClient, AsyncDatabase
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
 from typing import AsyncGenerator, Generator
 import os
 from dotenv import load_dotenv
@@ -24,7 +25,7 @@ def event_loop() -> Generator:
 async def test_db() -> AsyncGenerator[AsyncDatabase, None]:
     """Create a test database connection."""
     mongo_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-    client = AsyncClient(mongo_url)
+    client = AsyncMongoClient(mongo_url)
     db = client["credify_test"]
 
     # Clean up before test
@@ -34,7 +35,7 @@ async def test_db() -> AsyncGenerator[AsyncDatabase, None]:
 
     # Clean up after test
     await client.drop_database("credify_test")
-    client.close()
+    await client.close()
 
 
 @pytest.fixture
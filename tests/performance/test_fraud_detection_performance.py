@@ -28,10 +28,10 @@ async def test_auth_login_response_time(test_user):
     """Test login response time under 500ms."""
     from app.services.auth_service import AuthService
     from app.models.user import UserLogin
-    from motor.motor_asyncio import AsyncClient
+    from pymongo import AsyncMongoClient
 
     mongo_url = "mongodb://localhost:27017"
-    client = AsyncClient(mongo_url)
+    client = AsyncMongoClient(mongo_url)
     db = client["credify_test"]
 
     auth_service = AuthService(db)
@@ -48,7 +48,7 @@ async def test_auth_login_response_time(test_user):
     assert elapsed_time < 0.5, f"Login took {elapsed_time}s (target: <0.5s)"
     assert result["access_token"] is not None
 
-    client.close()
+    await client.close()
 
 
 @pytest.mark.asyncio
@@ -56,10 +56,10 @@ async def test_auth_login_response_time(test_user):
 async def test_certificate_retrieval_speed(test_certificate):
     """Test certificate retrieval speed."""
     from app.services.certificate_service import CertificateService
-    from motor.motor_asyncio import AsyncClient
+    from pymongo import AsyncMongoClient
 
     mongo_url = "mongodb://localhost:27017"
-    client = AsyncClient(mongo_url)
+    client = AsyncMongoClient(mongo_url)
     db = client["credify_test"]
 
     cert_service = CertificateService(db)
@@ -71,7 +71,7 @@ async def test_certificate_retrieval_speed(test_certificate):
     assert elapsed_time < 0.2, f"Certificate retrieval took {elapsed_time}s (target: <0.2s)"
     assert cert is not None
 
-    client.close()
+    await client.close()
 
 
 @pytest.mark.asyncio
@@ -79,11 +79,11 @@ async def test_certificate_retrieval_speed(test_certificate):
 async def test_batch_certificate_processing():
     """Test batch processing performance."""
     from app.services.certificate_service import CertificateService
-    from motor.motor_asyncio import AsyncClient
+    from pymongo import AsyncMongoClient
     from bson import ObjectId
 
     mongo_url = "mongodb://localhost:27017"
-    client = AsyncClient(mongo_url)
+    client = AsyncMongoClient(mongo_url)
     db = client["credify_test"]
 
     cert_service = CertificateService(db)
@@ -108,7 +108,7 @@ async def test_batch_certificate_processing():
     assert elapsed_time < 1.0, f"Batch retrieval took {elapsed_time}s (target: <1s)"
     assert len(certs) == 100
 
-    client.close()
+    await client.close()
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,41 @@
+"""Security tests for JWT verification."""
+import time
+
+import jwt
+import pytest
+
+from app.core.config import get_settings
+from app.core.security import create_access_token, decode_token
+
+
+def _encode(payload, key=None, algorithm="HS256"):
+    return jwt.encode(payload, key or get_settings().JWT_SECRET, algorithm=algorithm)
+
+
+@pytest.mark.security
+def test_issued_token_decodes():
+    """Test tokens issued by the service verify on the fast path."""
+    token = create_access_token({"sub": "user-1"})
+
+    payload = decode_token(token)
+
+    assert payload["sub"] == "user-1"
+    assert payload["type"] == "access"
+
+
+@pytest.mark.security
+def test_tampered_token_rejected():
+    """Test a token with a modified payload or foreign key is rejected."""
+    token = create_access_token({"sub": "user-1", "role": "student"})
+    header, _, signature = token.split(".")
+    forged = _encode({"sub": "user-1", "role": "admin", "exp": int(time.time()) + 60}).split(".")[1]
+
+    assert decode_token(f"{header}.{forged}.{signature}") is None
+    assert decode_token(_encode({"sub": "x", "exp": int(time.time()) + 60}, key="k" * 40)) is None
+
+
+@pytest.mark.security
+def test_expired_or_unbounded_token_rejected():
+    """Test expired tokens and tokens without exp are rejected."""
+    assert decode_token(_encode({"sub": "x", "exp": int(time.time()) - 1})) is None
+    assert decode_token(_encode({"sub": "x"})) is None
@@ -0,0 +1,38 @@
+"""Unit tests for the request-coalescing BatchQueue."""
+import asyncio
+
+import pytest
+
+from app.core.batch_queue import BatchQueue
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_queue_coalesces_concurrent_loads():
+    """Test concurrent loads are served by one loader call with distinct keys."""
+    batches = []
+
+    async def loader(keys):
+        batches.append(keys)
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    queue = BatchQueue(loader, default="none")
+    results = await asyncio.gather(
+        queue.load("a"), queue.load("b"), queue.load("a"), queue.load("missing"),
+    )
+
+    assert results == ["A", "B", "A", "none"]
+    assert batches == [["a", "b", "missing"]]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_queue_propagates_loader_errors():
+    """Test every caller in a failed batch receives the loader's exception."""
+    async def loader(keys):
+        raise RuntimeError("boom")
+
+    queue = BatchQueue(loader)
+    results = await asyncio.gather(queue.load(1), queue.load(2), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
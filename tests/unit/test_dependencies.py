@@ -0,0 +1,44 @@
+"""Unit tests for FastAPI auth dependencies."""
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.core.dependencies import verify_user_exists
+
+
+class _CountingUsers:
+    """Users collection stub that counts find_one calls."""
+
+    def __init__(self, user):
+        self.user = user
+        self.calls = 0
+
+    async def find_one(self, query, projection=None):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return dict(self.user)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_verify_user_exists_shares_concurrent_lookups(monkeypatch):
+    """Test a burst of lookups for one user issues a single query."""
+    async def cache_miss(user_id):
+        return None
+
+    async def no_cache(user_id, user, expire=30):
+        return None
+
+    monkeypatch.setattr("app.core.dependencies.get_cached_user", cache_miss)
+    monkeypatch.setattr("app.core.dependencies.cache_user", no_cache)
+
+    user_id = str(ObjectId())
+    users = _CountingUsers({"_id": ObjectId(user_id), "role": "student", "is_active": True})
+    db = {"users": users}
+
+    results = await asyncio.gather(*(verify_user_exists(user_id, db) for _ in range(10)))
+
+    assert users.calls == 1
+    assert all(result["_id"] == user_id for result in results)
+    assert results[0] is not results[1]
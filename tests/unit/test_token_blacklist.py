@@ -0,0 +1,91 @@
+"""Unit tests for the token blacklist filter."""
+import pytest
+
+from app.core.token_blacklist import BloomFilter, TokenBlacklist
+
+
+@pytest.mark.unit
+def test_bloom_filter_has_no_false_negatives():
+    """Test every added item is reported as present."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.001)
+    tokens = [f"token-{i}" for i in range(1000)]
+    for token in tokens:
+        bloom.add(token)
+
+    assert all(token in bloom for token in tokens)
+
+
+@pytest.mark.unit
+def test_bloom_filter_false_positive_rate():
+    """Test the false positive rate stays near the configured error rate."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"token-{i}")
+
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_blacklist_skips_redis_for_unknown_token(monkeypatch):
+    """Test a filter miss is answered locally once the filter is loaded."""
+    async def fail(token):
+        raise AssertionError("Redis should not be queried")
+
+    monkeypatch.setattr("app.core.token_blacklist.is_token_blacklisted", fail)
+    blacklist = TokenBlacklist(capacity=1000)
+    blacklist._ready = True
+
+    assert await blacklist.is_blacklisted("never-revoked") is False
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_blacklist_confirms_filter_hit_with_redis(monkeypatch):
+    """Test a filter hit is confirmed against Redis."""
+    async def revoked(token):
+        return token == "revoked"
+
+    monkeypatch.setattr("app.core.token_blacklist.is_token_blacklisted", revoked)
+    blacklist = TokenBlacklist(capacity=1000)
+    blacklist._ready = True
+    blacklist.add_local("revoked")
+
+    assert await blacklist.is_blacklisted("revoked") is True
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_revoked_user_checked_locally(monkeypatch):
+    """Test only users in the local revoked set are confirmed with Redis."""
+    async def revoked(user_id):
+        return user_id == "disabled-user"
+
+    monkeypatch.setattr("app.core.token_blacklist.is_user_revoked", revoked)
+    blacklist = TokenBlacklist(capacity=1000)
+    blacklist._ready = True
+    blacklist._revoked_users.add("disabled-user")
+
+    assert await blacklist.is_user_revoked("disabled-user") is True
+    assert await blacklist.is_user_revoked("active-user") is False
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_check_answers_locally_when_both_filters_miss(monkeypatch):
+    """Test the combined check only calls Redis on a local hit."""
+    calls = []
+
+    async def preflight(token, user_id):
+        calls.append((token, user_id))
+        return token == "revoked", False
+
+    monkeypatch.setattr("app.core.token_blacklist.auth_preflight", preflight)
+    blacklist = TokenBlacklist(capacity=1000)
+    blacklist._ready = True
+    blacklist.add_local("revoked")
+
+    assert await blacklist.check("fresh", "user-1") == (False, False)
+    assert await blacklist.check("revoked", "user-1") == (True, False)
+    assert calls == [("revoked", "user-1")]